@@ -0,0 +1,80 @@
+from opcodes import (OP_LOAD, OP_STORE, OP_LOADI, OP_ADD, OP_SUB, OP_MULT, OP_LSHIFT,
+                     OP_RSHIFT, OP_OUTPUT, DEFINES_REGISTER)
+
+# Values are tracked only while they fit in the simulator's 32-bit word
+WORD_MIN = -(1 << 31)
+WORD_MAX = (1 << 31) - 1
+
+# Memory is accessed in words; an address that is not word aligned may
+# overlap two words, so it is treated as unknown
+WORD_SIZE = 4
+
+def fold(opcode, x, y):
+    """
+    Returns the value an arithmetic operation computes from the constants
+    x and y, or None if it is not a word-sized value.
+    """
+    if opcode == OP_ADD:
+        value = x + y
+    elif opcode == OP_SUB:
+        value = x - y
+    elif opcode == OP_MULT:
+        value = x * y
+    elif opcode == OP_LSHIFT or opcode == OP_RSHIFT:
+        if not 0 <= y < 32:
+            return None
+        value = x << y if opcode == OP_LSHIFT else x >> y
+    else:
+        return None
+    if WORD_MIN <= value <= WORD_MAX:
+        return value
+    return None
+
+def memory_addresses(ir):
+    """
+    Finds the addresses that loads, stores and outputs access when they
+    can be proven from the block alone: a forward pass over the IR's
+    operand_rows tracks the value of every virtual register defined by
+    loadI, or by arithmetic on registers whose values are known.
+
+    Inputs:
+    - ir (ILOCLinkedList or ColumnarIR): The IR, after rename_registers.
+
+    Outputs:
+    - A list with one entry per instruction in list order: the word-aligned
+      address it accesses, or None if it does not access memory or the
+      address is unknown.
+    """
+    values = {}
+    addresses = []
+
+    for _, opcode, sr1, vr1, vr2, vr3 in ir.operand_rows():
+        address = None
+
+        if opcode == OP_LOAD:
+            address = values.get(vr1)
+        elif opcode == OP_STORE:
+            address = values.get(vr3)
+        elif opcode == OP_OUTPUT:
+            address = sr1
+
+        if DEFINES_REGISTER[opcode]:
+            value = None
+            if opcode == OP_LOADI:
+                value = sr1
+            elif opcode != OP_LOAD:
+                x = values.get(vr1)
+                y = values.get(vr2)
+                if x is not None and y is not None:
+                    value = fold(opcode, x, y)
+
+            if value is None:
+                values.pop(vr3, None)
+            else:
+                values[vr3] = value
+
+        if address is not None and address % WORD_SIZE != 0:
+            address = None
+        addresses.append(address)
+
+    return addresses
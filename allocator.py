@@ -1,14 +1,19 @@
-from iloc_ir import Argument, ILOCNode, ILOCLinkedList
+from array import array
+from iloc_ir import Argument, ILOCNode
+from opcodes import OP_LOAD, OP_STORE, OP_LOADI
 from parser_1 import parse, find_use_defs
+from liveness import Liveness
 
 class Allocator:
-    def __init__(self, k: int, ir: ILOCLinkedList):
+    def __init__(self, k: int, ir, renamed=None):
         self.k = k
         
-        # Rename the internal representation
-        res = ir.rename_registers()
+        # Rename the internal representation, unless it was renamed already
+        # (e.g. loaded from the IR cache) and renamed holds (max_vr, max_live)
+        res = renamed if renamed is not None else ir.rename_registers()
 
         self.int_rep = ir
+        # A register is reserved for spill code only if the pressure somewhere exceeds k
         self.MAXLIVE = res[1]
         self.vr_count = res[0]
         self.VRToSpillLoc = [-1 for _ in range(self.vr_count + 1)]
@@ -26,19 +31,35 @@ class Allocator:
             self.PRStack.remove(self.spill_reg)
         else:
             self.spill_reg = None
+
+        # Where spilling can happen, the first instruction at or after each
+        # instruction whose register pressure fits in the allocatable registers
+        self.relief = None
+        if self.spill_reg is not None:
+            self.relief = self.relief_points(Liveness(ir), k - 1)
+
+    def relief_points(self, liveness, available):
+        """
+        Returns, for every instruction, the line number of the first
+        instruction at or after it whose register pressure is at most
+        available, or the number of instructions if there is none.
+        """
+        pressure = liveness.pressure
+        count = len(pressure)
+        relief = array('i', bytes(4 * count))
+        next_relief = count
+        for index in range(count - 1, -1, -1):
+            if pressure[index] <= available:
+                next_relief = index
+            relief[index] = next_relief
+        return relief
         
             
     def insert_before(self, new_node, existing_node):
         """
-        Inserts new_node before existing_node in the linked list.
+        Inserts new_node before existing_node in the IR.
         """
-        if existing_node.prev is not None:
-            existing_node.prev.next = new_node
-            new_node.prev = existing_node.prev
-        new_node.next = existing_node
-        existing_node.prev = new_node
-        if self.int_rep.head == existing_node:
-            self.int_rep.head = new_node
+        self.int_rep.insert_before(new_node, existing_node)
 
     def get_PR(self, vr, nu, op):
         """
@@ -48,7 +69,7 @@ class Allocator:
         if len(self.PRStack) > 0:
             pr = self.PRStack.pop()
         else:
-            pr = self.choose_spill_pr()
+            pr = self.choose_spill_pr(op)
 
             if pr == -1:
                 raise Exception("No physical registers were available to spill")
@@ -69,21 +90,36 @@ class Allocator:
         self.PRToNU[pr] = float('inf')
         self.PRStack.append(pr)
 
-    def choose_spill_pr(self):
+    def choose_spill_pr(self, op):
         """
-        Chooses the PR to spill by finding the PR with the farthest next use. 
+        Chooses the PR to spill at op. A value that is already in its spill
+        location is dropped without a store, so the one with the farthest
+        next use is chosen if that use comes after the pressure falls back
+        to the allocatable registers; otherwise the PR with the farthest
+        next use.
         """
         # set to -inf
         max_next_use = -float('inf')  
         # set an invalid index
         pr_to_spill = -1  
+        # the same, among PRs holding an already spilled VR
+        max_clean_use = -float('inf')
+        clean_pr = -1
+        relief = self.relief[op.line_number]
 
         for i in range(len(self.PRToNU)):
-            if self.PRToNU[i] > max_next_use and i != self.spill_reg and i != self.mark:
+            if i == self.spill_reg or i == self.mark:
+                continue
+            if self.PRToNU[i] > max_next_use:
                 max_next_use = self.PRToNU[i]
                 pr_to_spill = i
-        
-        return pr_to_spill
+            vr = self.PRToVR[i]
+            if (vr != -1 and self.VRToSpillLoc[vr] != -1 and self.PRToNU[i] >= relief
+                    and self.PRToNU[i] > max_clean_use):
+                max_clean_use = self.PRToNU[i]
+                clean_pr = i
+
+        return clean_pr if clean_pr != -1 else pr_to_spill
 
     def spill(self, pr: int, curr_node: ILOCNode):
         """
@@ -97,19 +133,21 @@ class Allocator:
             print(f"ERROR: Attempting to spill a PR that does not have a corresponding VR")
             return
         
+        # Each VR is defined once, so once stored its spill location stays
+        # current and it can be spilled again without another store
         if self.VRToSpillLoc[vr_to_spill] == -1:
             self.VRToSpillLoc[vr_to_spill] = self.next_spill_location
             self.next_spill_location += 4
 
-        spill_loc = self.VRToSpillLoc[vr_to_spill]
+            spill_loc = self.VRToSpillLoc[vr_to_spill]
 
-        # Spill nodes to insert
-        loadI_spill = ILOCNode(arg1=Argument(sr=spill_loc), arg2=Argument(), arg3=Argument(pr=self.spill_reg), opcode="loadI")
-        store_spill = ILOCNode(arg1=Argument(vr=vr_to_spill, pr=pr), arg2=Argument(), arg3=Argument(pr=self.spill_reg), opcode="store")
+            # Spill nodes to insert
+            loadI_spill = ILOCNode(arg1=Argument(sr=spill_loc), arg2=Argument(), arg3=Argument(pr=self.spill_reg), opcode=OP_LOADI)
+            store_spill = ILOCNode(arg1=Argument(vr=vr_to_spill, pr=pr), arg2=Argument(), arg3=Argument(pr=self.spill_reg), opcode=OP_STORE)
 
-        # Insert LOADI and STORE nodes
-        self.insert_before(loadI_spill, curr_node) 
-        self.insert_before(store_spill, curr_node) 
+            # Insert LOADI and STORE nodes
+            self.insert_before(loadI_spill, curr_node) 
+            self.insert_before(store_spill, curr_node) 
 
         # Update the maps to show that pr is now free
         self.VRToPR[vr_to_spill] = -1
@@ -128,8 +166,8 @@ class Allocator:
             print(f"ERROR: This vr does not have a corresponding spill location. It must have been spilled.")
             return 
         
-        loadI_restore = ILOCNode(arg1=Argument(sr=vr_spill_loc), arg2=Argument(), arg3=Argument(pr=self.spill_reg), opcode="loadI")
-        load_restore = ILOCNode(arg1=Argument(pr=self.spill_reg), arg2=Argument(), arg3=Argument(vr=vr, pr=pr), opcode="load")
+        loadI_restore = ILOCNode(arg1=Argument(sr=vr_spill_loc), arg2=Argument(), arg3=Argument(pr=self.spill_reg), opcode=OP_LOADI)
+        load_restore = ILOCNode(arg1=Argument(pr=self.spill_reg), arg2=Argument(), arg3=Argument(vr=vr, pr=pr), opcode=OP_LOAD)
 
         # Insert the LOADI and LOAD instructions before the current node
         self.insert_before(loadI_restore, curr_node) 
@@ -170,6 +208,9 @@ class Allocator:
             
             for d in defs:
                 d.pr = self.get_PR(d.vr, d.nu, curr_node)
+                # A value that is never used does not hold its register past this operation
+                if d.nu == float('inf'):
+                    self.free_PR(d.pr)
 
             #self.check_mappings()
 
@@ -0,0 +1,618 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from iloc_ir import Argument, ILOCNode, ILOCLinkedList, format_instruction, register_table
+from opcodes import OP_LOADI, OP_OUTPUT, DEFINES_REGISTER, USE_SLOTS, REGISTER_SLOTS
+
+# Column value standing for None (no register / no link)
+NONE = -1
+# Next-use column value standing for float('inf') (no further use)
+NU_INFINITY = -2
+
+# Blocks with at least this many instructions are renamed with NumPy when it
+# is installed; below it the sequential pass is faster
+VECTORIZED_THRESHOLD = 2048
+
+class ArgumentView:
+    """
+    A view of one operand of one instruction in a ColumnarIR. Reads and writes
+    go straight to the IR's columns, so it behaves like an Argument without
+    storing anything itself.
+
+    Attributes:
+    - ir (ColumnarIR): The IR holding the columns.
+    - index (int): The instruction number.
+    - slot (int): The operand position (0, 1 or 2 for arg1, arg2, arg3).
+    """
+    __slots__ = ("ir", "index", "slot")
+
+    def __init__(self, ir, index, slot):
+        self.ir = ir
+        self.index = index
+        self.slot = slot
+
+    @property
+    def sr(self):
+        value = self.ir.sr[self.slot][self.index]
+        return None if value == NONE else value
+
+    @sr.setter
+    def sr(self, value):
+        self.ir.sr[self.slot][self.index] = NONE if value is None else value
+
+    @property
+    def vr(self):
+        value = self.ir.vr[self.slot][self.index]
+        return None if value == NONE else value
+
+    @vr.setter
+    def vr(self, value):
+        self.ir.vr[self.slot][self.index] = NONE if value is None else value
+
+    @property
+    def pr(self):
+        value = self.ir.pr[self.slot][self.index]
+        return None if value == NONE else value
+
+    @pr.setter
+    def pr(self, value):
+        self.ir.pr[self.slot][self.index] = NONE if value is None else value
+
+    @property
+    def nu(self):
+        value = self.ir.nu[self.slot][self.index]
+        if value == NONE:
+            return None
+        if value == NU_INFINITY:
+            return float('inf')
+        return value
+
+    @nu.setter
+    def nu(self, value):
+        self.ir.nu[self.slot][self.index] = encode_nu(value)
+
+class InstructionView:
+    """
+    A view of one instruction in a ColumnarIR, with the same interface as
+    ILOCNode (opcode, arg1-arg3, prev, next). Views are created on demand and
+    compare equal when they refer to the same instruction.
+
+    Attributes:
+    - ir (ColumnarIR): The IR holding the columns.
+    - index (int): The instruction number.
+    - args (tuple): The three ArgumentViews, made on first use and kept.
+    """
+    __slots__ = ("ir", "index", "args")
+
+    def __init__(self, ir, index):
+        self.ir = ir
+        self.index = index
+        self.args = None
+
+    def __eq__(self, other):
+        return isinstance(other, InstructionView) and self.ir is other.ir and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.ir), self.index))
+
+    @property
+    def opcode(self):
+        return self.ir.opcodes[self.index]
+
+    def arguments(self):
+        """
+        Returns the views of the three operands, creating them once.
+        """
+        if self.args is None:
+            ir = self.ir
+            index = self.index
+            self.args = (ArgumentView(ir, index, 0), ArgumentView(ir, index, 1), ArgumentView(ir, index, 2))
+        return self.args
+
+    @property
+    def arg1(self):
+        return self.arguments()[0]
+
+    @property
+    def arg2(self):
+        return self.arguments()[1]
+
+    @property
+    def arg3(self):
+        return self.arguments()[2]
+
+    @property
+    def next(self):
+        return self.ir.instruction(self.ir.next_index[self.index])
+
+    @property
+    def prev(self):
+        return self.ir.instruction(self.ir.prev_index[self.index])
+
+    @property
+    def line_number(self):
+        return self.index
+
+    # Formatting is shared with ILOCNode
+    format_operand = ILOCNode.format_operand
+
+    def __str__(self):
+        ir = self.ir
+        index = self.index
+        operands = [None if column[index] == NONE else column[index]
+                    for column in (ir.sr[0], ir.vr[0], ir.vr[1], ir.vr[2])]
+        return format_instruction(ir.opcodes[index], *operands)
+
+def encode_nu(value):
+    """
+    Converts a next-use value to its column encoding.
+    """
+    if value is None:
+        return NONE
+    if value == float('inf'):
+        return NU_INFINITY
+    return int(value)
+
+class ColumnarIR:
+    """
+    A struct-of-arrays alternative to ILOCLinkedList. Every instruction is a
+    row number; its opcode and the sr/vr/pr/nu fields of its three operands
+    live in typed arrays, and the list order is kept in next/prev index
+    columns so instructions can still be inserted (e.g. spill code).
+
+    Passes written against ILOCLinkedList work unchanged through the
+    InstructionView/ArgumentView API (head, next, opcode, arg1.vr, ...).
+
+    Attributes:
+    - opcodes (array): Opcode number of every instruction (opcodes.OP_*).
+    - sr, vr, pr, nu (tuple of array): One column per operand slot.
+    - next_index, prev_index (array): List links, NONE at the ends.
+    - head_index, tail_index (int): First and last instruction, NONE if empty.
+    - max_register (int): The highest source register named by any register
+      operand, -1 if there is none.
+    """
+    def __init__(self):
+        self.opcodes = array('b')
+        self.sr = (array('q'), array('q'), array('q'))
+        self.vr = (array('i'), array('i'), array('i'))
+        self.pr = (array('i'), array('i'), array('i'))
+        self.nu = (array('i'), array('i'), array('i'))
+        self.next_index = array('i')
+        self.prev_index = array('i')
+        self.head_index = NONE
+        self.tail_index = NONE
+        self.max_register = -1
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def __iter__(self):
+        for index in self.order():
+            yield InstructionView(self, index)
+
+    def operand_rows(self, reverse=False):
+        """
+        Returns the operands of every instruction in list order as tuples
+        read straight from the columns, like ILOCLinkedList.operand_rows:
+        (index, opcode, sr1, vr1, vr2, vr3). Unused operands are NONE.
+
+        Inputs:
+        - reverse (bool): Start from the tail instead of the head.
+        """
+        order = self.order()
+        if reverse:
+            order.reverse()
+        vr1, vr2, vr3 = self.vr
+        return zip(order, map(self.opcodes.__getitem__, order), map(self.sr[0].__getitem__, order),
+                   map(vr1.__getitem__, order), map(vr2.__getitem__, order), map(vr3.__getitem__, order))
+
+    @property
+    def head(self):
+        return self.instruction(self.head_index)
+
+    @property
+    def tail(self):
+        return self.instruction(self.tail_index)
+
+    def instruction(self, index):
+        """
+        Returns a view of the instruction with the given number, or None for NONE.
+        """
+        if index == NONE:
+            return None
+        return InstructionView(self, index)
+
+    def new_row(self, opcode, sr, vr=(NONE, NONE, NONE), pr=(NONE, NONE, NONE), nu=(NONE, NONE, NONE)):
+        """
+        Appends an unlinked row to every column and returns its index.
+        """
+        index = len(self.opcodes)
+        self.opcodes.append(opcode)
+        for slot in REGISTER_SLOTS[opcode]:
+            if sr[slot] > self.max_register:
+                self.max_register = sr[slot]
+        for slot in range(3):
+            self.sr[slot].append(sr[slot])
+            self.vr[slot].append(vr[slot])
+            self.pr[slot].append(pr[slot])
+            self.nu[slot].append(nu[slot])
+        self.next_index.append(NONE)
+        self.prev_index.append(NONE)
+        return index
+
+    def link_at_tail(self, index):
+        """
+        Links a row at the end of the instruction list.
+        """
+        if self.tail_index == NONE:
+            self.head_index = index
+        else:
+            self.next_index[self.tail_index] = index
+            self.prev_index[index] = self.tail_index
+        self.tail_index = index
+
+    def append(self, opcode, sr1=None, sr2=None, sr3=None):
+        """
+        Adds a new instruction with the given source registers (or constants)
+        to the end of the list without creating any per-instruction objects.
+        """
+        index = self.new_row(opcode, (
+            NONE if sr1 is None else sr1,
+            NONE if sr2 is None else sr2,
+            NONE if sr3 is None else sr3,
+        ))
+        self.link_at_tail(index)
+
+    def extend_columns(self, opcodes, sr, vr=None, nu=None):
+        """
+        Appends a run of instructions given as columns, e.g. the arrays a
+        parse worker returns, and links them at the end of the list.
+
+        Inputs:
+        - opcodes (array): The opcode number of every instruction.
+        - sr (tuple of array): The sr column of each operand slot, NONE where unused.
+        - vr, nu (tuple of array): The vr and nu columns of an already renamed
+          run, or None to leave them unset.
+        """
+        count = len(opcodes)
+        if count == 0:
+            return
+        start = len(self.opcodes)
+        unset = array('i', [NONE]) * count
+
+        self.opcodes.extend(opcodes)
+        # Operand 1 of loadI and output is a constant, not a register
+        registers = [sr1 for opcode, sr1 in zip(opcodes, sr[0]) if opcode != OP_LOADI and opcode != OP_OUTPUT]
+        self.max_register = max(self.max_register, max(registers, default=-1), max(sr[1]), max(sr[2]))
+        for slot in range(3):
+            self.sr[slot].extend(sr[slot])
+            self.vr[slot].extend(unset if vr is None else vr[slot])
+            self.pr[slot].extend(unset)
+            self.nu[slot].extend(unset if nu is None else nu[slot])
+        self.next_index.extend(range(start + 1, start + count + 1))
+        self.prev_index.extend(range(start - 1, start + count - 1))
+        self.next_index[-1] = NONE
+        self.prev_index[start] = NONE
+
+        self.link_at_tail(start)
+        self.tail_index = start + count - 1
+
+    def truncate(self, count):
+        """
+        Drops every row numbered count or above, including a row left partly
+        written by a value that did not fit its column. The dropped rows
+        must be the last instructions of the list, as they are while a
+        parser appends. max_register is left as it is.
+        """
+        del self.opcodes[count:]
+        for column in self.sr + self.vr + self.pr + self.nu:
+            del column[count:]
+        del self.next_index[count:]
+        del self.prev_index[count:]
+        if count == 0:
+            self.head_index = NONE
+            self.tail_index = NONE
+        else:
+            self.next_index[count - 1] = NONE
+            self.tail_index = count - 1
+
+    def row_from_node(self, node: ILOCNode):
+        """
+        Copies an ILOCNode into a new unlinked row and returns its index.
+        """
+        args = (node.arg1, node.arg2, node.arg3)
+        field = lambda name: tuple(NONE if getattr(arg, name) is None else getattr(arg, name) for arg in args)
+        return self.new_row(node.opcode, field("sr"), field("vr"), field("pr"),
+                            tuple(encode_nu(arg.nu) for arg in args))
+
+    def add_instruction(self, node: ILOCNode):
+        """
+        Adds a copy of an ILOCNode to the end of the list.
+        """
+        self.link_at_tail(self.row_from_node(node))
+
+    def insert_before(self, new_node: ILOCNode, existing_node: InstructionView):
+        """
+        Inserts a copy of new_node before existing_node.
+        """
+        index = self.row_from_node(new_node)
+        after = existing_node.index
+        before = self.prev_index[after]
+
+        self.prev_index[index] = before
+        self.next_index[index] = after
+        self.prev_index[after] = index
+        if before == NONE:
+            self.head_index = index
+        else:
+            self.next_index[before] = index
+
+    def to_linked_list(self):
+        """
+        Copies the instructions into an ILOCLinkedList in list order, with the
+        line numbers rename_registers would have assigned.
+        """
+        infinity = float('inf')
+
+        def arguments(slot):
+            # One Argument per row for the given operand slot
+            args = []
+            for sr, pr, vr, nu in zip(self.sr[slot], self.pr[slot], self.vr[slot], self.nu[slot]):
+                arg = Argument(None if sr == NONE else sr, None if pr == NONE else pr, None if vr == NONE else vr)
+                # Set directly, since Argument() would truncate an infinite next use
+                if nu != NONE:
+                    arg.nu = infinity if nu == NU_INFINITY else nu
+                args.append(arg)
+            return args
+
+        linked = ILOCLinkedList()
+        opcodes = self.opcodes
+        args1, args2, args3 = arguments(0), arguments(1), arguments(2)
+        for position, index in enumerate(self.order()):
+            node = ILOCNode(arg1=args1[index], arg2=args2[index], arg3=args3[index], opcode=opcodes[index])
+            node.line_number = position
+            linked.add_instruction(node)
+        return linked
+
+    def order(self):
+        """
+        Returns the instruction numbers in list order.
+        """
+        order = array('i')
+        index = self.head_index
+        next_index = self.next_index
+        while index != NONE:
+            order.append(index)
+            index = next_index[index]
+        return order
+
+    def print_instructions(self):
+        """
+        Prints all ILOC instructions in list order.
+        """
+        for index in self.order():
+            print(InstructionView(self, index))
+
+    def rename_registers(self):
+        """
+        Renames source registers to virtual registers with the same results
+        as ILOCLinkedList.rename_registers. Large blocks use the vectorized
+        rename_registers_numpy when NumPy is installed.
+
+        Returns:
+        - max_vr (int): The highest virtual register used.
+        - max_live (int): MAXLIVE, the largest number of virtual registers live at the same time.
+        """
+        if numpy is not None and len(self.opcodes) >= VECTORIZED_THRESHOLD:
+            return self.rename_registers_numpy()
+        return self.rename_registers_sequential()
+
+    def rename_registers_sequential(self):
+        """
+        Renames source registers to virtual registers with the same single
+        backward pass as ILOCLinkedList.rename_registers, walking the
+        prev_index column and working directly on the columns.
+
+        Returns:
+        - max_vr (int): The highest virtual register used.
+        - max_live (int): MAXLIVE, the largest number of virtual registers live at the same time.
+        """
+        sr_to_vr = register_table(self.max_register, len(self.opcodes), NONE)
+        lu = register_table(self.max_register, len(self.opcodes), NU_INFINITY)
+
+        max_vr = -1
+        live = 0
+        max_live = 0
+
+        opcodes = self.opcodes
+        prev_index = self.prev_index
+        sr_cols = self.sr
+        vr_cols = self.vr
+        nu_cols = self.nu
+        sr1_col, _, sr3_col = sr_cols
+        vr1_col, _, vr3_col = vr_cols
+        nu1_col, _, nu3_col = nu_cols
+
+        position = len(opcodes) - 1
+        index = self.tail_index
+        while index != NONE:
+            opcode = opcodes[index]
+
+            # Definition: the value is not live above this operation
+            if DEFINES_REGISTER[opcode]:
+                sr = sr3_col[index]
+                vr = sr_to_vr[sr]
+                if vr == NONE:
+                    # Never used, but it still occupies a register here
+                    max_vr += 1
+                    vr = max_vr
+                    if live + 1 > max_live:
+                        max_live = live + 1
+                else:
+                    live -= 1
+                vr3_col[index] = vr
+                nu3_col[index] = lu[sr]
+                sr_to_vr[sr] = NONE
+                lu[sr] = NU_INFINITY
+
+            # Uses: the value is live from its definition to here. Every
+            # opcode that reads registers reads operand 1, and at most one more
+            slots = USE_SLOTS[opcode]
+            if slots:
+                sr = sr1_col[index]
+                vr = sr_to_vr[sr]
+                if vr == NONE:
+                    max_vr += 1
+                    vr = sr_to_vr[sr] = max_vr
+                    live += 1
+                vr1_col[index] = vr
+                nu1_col[index] = lu[sr]
+
+                if len(slots) == 2:
+                    slot = slots[1]
+                    other = sr_cols[slot][index]
+                    vr = sr_to_vr[other]
+                    if vr == NONE:
+                        max_vr += 1
+                        vr = sr_to_vr[other] = max_vr
+                        live += 1
+                    vr_cols[slot][index] = vr
+                    nu_cols[slot][index] = lu[other]
+                    lu[other] = position
+                lu[sr] = position
+
+                if live > max_live:
+                    max_live = live
+
+            position -= 1
+            index = prev_index[index]
+
+        return max_vr, max_live
+
+    def rename_registers_numpy(self):
+        """
+        Vectorized renaming with NumPy, giving the same vr/nu columns and
+        result as rename_registers_sequential without a per-instruction loop.
+
+        Every register operand is an event (position, register, use or def).
+        Sorting the events by register and position splits them into live
+        ranges, each starting at a def (or at the top of the block) and
+        holding the uses up to the next def of the register. The sequential
+        pass hands out a new VR when, walking backwards, it first meets a
+        range, so VRs are the ranks of the ranges' last events in that order.
+        A next use is the position of the next group of uses in the same range.
+
+        Returns:
+        - max_vr (int): The highest virtual register used.
+        - max_live (int): MAXLIVE, the largest number of virtual registers live at the same time.
+        """
+        np = numpy
+        count = len(self.opcodes)
+        if count == 0:
+            return -1, 0
+
+        # Rows are usually still in list order (nothing inserted yet)
+        order = np.arange(count)
+        next_index = np.frombuffer(self.next_index, dtype=np.int32)
+        if not (self.head_index == 0 and np.array_equal(next_index[:-1], order[1:])
+                and next_index[-1] == NONE):
+            order = np.frombuffer(self.order(), dtype=np.int32).astype(np.intp)
+
+        opcodes = np.frombuffer(self.opcodes, dtype=np.int8)[order]
+        sr = [np.frombuffer(column, dtype=np.int64)[order] for column in self.sr]
+
+        def opcode_mask(table):
+            return np.array(table, dtype=bool)[opcodes]
+
+        # Events: (position, register, kind, slot), kind 0 for a use and 1 for
+        # a def; rank is the order within an instruction when walking backwards
+        # (def, then operand 1, then the other use)
+        positions, registers, kinds, slots, ranks = [], [], [], [], []
+        for slot, kind, rank, table in (
+            (2, 1, 0, DEFINES_REGISTER),
+            (0, 0, 1, [0 in uses for uses in USE_SLOTS]),
+            (1, 0, 2, [1 in uses for uses in USE_SLOTS]),
+            (2, 0, 2, [2 in uses for uses in USE_SLOTS]),
+        ):
+            found = np.nonzero(opcode_mask(table))[0]
+            positions.append(found)
+            registers.append(sr[slot][found])
+            kinds.append(np.full(len(found), kind, dtype=np.int8))
+            slots.append(np.full(len(found), slot, dtype=np.int8))
+            ranks.append(np.full(len(found), rank, dtype=np.int8))
+
+        position = np.concatenate(positions)
+        register = np.concatenate(registers)
+        kind = np.concatenate(kinds)
+        slot = np.concatenate(slots)
+        rank = np.concatenate(ranks)
+        if len(position) == 0:
+            return -1, 0
+
+        # Program order per register; at one position the uses come before
+        # the def. Every event has its own key, so a plain argsort will do.
+        if (self.max_register + 1) * count * 6 >= 1 << 62:
+            # Sparse register numbers: number the distinct registers densely
+            register = np.unique(register, return_inverse=True)[1]
+        events = np.argsort(((register * count + position) * 2 + kind) * 3 + slot)
+        position, register, kind, slot, rank = (
+            position[events], register[events], kind[events], slot[events], rank[events])
+
+        # A live range starts at every def and wherever the register changes
+        new_register = np.empty(len(events), dtype=bool)
+        new_register[0] = True
+        new_register[1:] = register[1:] != register[:-1]
+        range_start = new_register | (kind == 1)
+        range_id = np.cumsum(range_start) - 1
+        starts = np.nonzero(range_start)[0]
+        ends = np.append(starts[1:], len(events)) - 1
+
+        # Groups of events of one range at one position (two uses of the same register)
+        group_start = range_start.copy()
+        group_start[1:] |= position[1:] != position[:-1]
+        group_id = np.cumsum(group_start) - 1
+        group_first = np.nonzero(group_start)[0]
+        group_position = position[group_first]
+        group_range = range_id[group_first]
+
+        # Next use: the position of the next group in the same range
+        next_use = np.full(len(group_first), NU_INFINITY, dtype=np.int64)
+        same_range = group_range[1:] == group_range[:-1]
+        next_use[:-1][same_range] = group_position[1:][same_range]
+        nu = next_use[group_id]
+
+        # A range is first met, walking backwards, at the first event of its last group
+        opening = group_first[group_id[ends]]
+        open_position = position[opening]
+        vr_of_range = np.empty(len(starts), dtype=np.int64)
+        vr_of_range[np.argsort((count - open_position) * 3 + rank[opening])] = np.arange(len(starts))
+        vr = vr_of_range[range_id]
+
+        rows = order[position]
+        for column in range(3):
+            selected = slot == column
+            np.frombuffer(self.vr[column], dtype=np.int32)[rows[selected]] = vr[selected]
+            np.frombuffer(self.nu[column], dtype=np.int32)[rows[selected]] = nu[selected]
+
+        # live_in[p] counts the ranges defined before p (or live on entry)
+        # whose last use is at or after p
+        defined = kind[starts] == 1
+        first = np.where(defined, position[starts], -1)
+        live_in = np.cumsum(np.bincount(first + 1, minlength=count + 2)
+                            - np.bincount(open_position + 1, minlength=count + 2))[:count + 1]
+
+        # The sequential pass checks the live count after the uses of every
+        # operation that has uses, and at every def that is never used
+        has_uses = np.nonzero(opcode_mask([bool(uses) for uses in USE_SLOTS]))[0]
+        dead = defined & (starts == ends)
+        candidates = [live_in[has_uses], live_in[position[starts[dead]] + 1] + 1]
+        max_live = int(max((values.max() for values in candidates if len(values)), default=0))
+
+        return len(starts) - 1, max_live
+
+    # Printing walks head/next, which the views provide
+    print_renamed_ILOC = ILOCLinkedList.print_renamed_ILOC
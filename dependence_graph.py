@@ -1,15 +1,59 @@
+from array import array
+from addresses import memory_addresses
+from opcodes import (OP_OUTPUT, LATENCY, DEFINES_REGISTER, READS_MEMORY, WRITES_MEMORY,
+                     USE_SLOTS)
+
+# Most known addresses tracked between two barriers (stores to unknown
+# addresses); a store to one more address becomes a barrier itself
+ADDRESS_LIMIT = 64
+
+# Edge kinds
+EDGE_DATA = 0
+EDGE_CONFLICT = 1
+EDGE_SERIAL = 2
+
+edge_kind_names = ["data", "conflict", "serial"]
+
+# Cycles a serial edge holds back its dependent: it only orders the two
+# memory operations, so the dependent may issue on the next cycle
+SERIAL_DELAY = 1
+
+# succ_vrs entry of an edge that carries no register
+NO_REGISTER = -1
+
 class Node:
-    def __init__(self, instruction):
+    __slots__ = ("instruction", "index", "priority", "status", "max_latency")
+
+    def __init__(self, instruction, index):
         """
         Represents a node in the dependence graph.
         Args:
             instruction (ILOCNode): The instruction this node represents.
+            index (int): The node's id, its position in DependenceGraph.nodes.
         """
         self.instruction = instruction
+        self.index = index
         self.priority = 0
-        self.status = 1  # 1: not ready, 2: ready, 3: active, 4: retired
+        self.status = 1  # 1: not ready, 2: ready, 3: issued
+        # Latency-weighted path length, filled in by calculate_priorities
+        self.max_latency = None
 
 class DependenceGraph:
+    """
+    A dependence graph stored in compressed sparse row form. Node ids are
+    positions in nodes (program order). An edge runs from an instruction
+    to an earlier instruction it depends on; the successors of node i are
+    succ_targets[succ_offsets[i]:succ_offsets[i + 1]], with the edge kinds
+    in succ_kinds and succ_vrs at the same positions. The pred_ arrays hold the same
+    edges reversed, so the predecessors of node i are the instructions
+    that depend on it.
+
+    Attributes:
+    - nodes (list): The Node of each instruction, in program order.
+    - succ_offsets, succ_targets, succ_kinds (array): Edges by source node.
+    - succ_vrs (array): The VR a data edge carries, NO_REGISTER otherwise.
+    - pred_offsets, pred_targets, pred_kinds (array): Edges by target node.
+    """
     def __init__(self, ir):
         """
         Initialize the dependence graph with the intermediate representation (IR) of instructions.
@@ -17,84 +61,188 @@ class DependenceGraph:
             ir (ILOCLinkedList): The IR linked list containing instructions.
         """
         self.ir = ir
-        self.nodes = []  
-        self.edges = {}  
+        self.nodes = []
+        self.succ_offsets = array('i', [0])
+        self.succ_targets = array('i')
+        self.succ_kinds = array('b')
+        self.succ_vrs = array('i')
+        self.pred_offsets = array('i', [0])
+        self.pred_targets = array('i')
+        self.pred_kinds = array('b')
     
     def build_graph(self):
-        # Maps each VR to the latest node that defines it
+        """
+        Adds data, conflict and serial edges for every instruction in the IR,
+        then fills in the reversed (pred_) arrays.
+        Memory edges are only added between operations that may touch the
+        same word (see addresses.memory_addresses), and only to the nearest
+        operations that order them: stores to one address are chained, a
+        store with an unknown address is a barrier every later memory
+        operation follows, and outputs stay in program order. Every other
+        ordering is implied by a path through those edges. At most
+        ADDRESS_LIMIT addresses are tracked between barriers, which keeps
+        the edge count linear in the size of the block.
+        """
+        addresses = memory_addresses(self.ir)
+
+        # Maps each VR to the id of the latest node that defines it
         last_def = {}  
 
-        # Track all previous memory operations (store, output)
-        last_memory_ops = []
-
-        current_instruction = self.ir.head
-        while current_instruction:
-            node = Node(current_instruction)
-            self.nodes.append(node)
-            self.edges[node] = []
-
-            # Get the virtual registers defined and used by the current instruction
-            defs = self.get_defs(current_instruction)
-            uses = self.get_uses(current_instruction)
-            
-            if len(defs) > 0:
-                last_def[defs[0]] = node
-
-            # 1. Handle regular dependencies
-            for vr in uses:
-                if vr in last_def:
-                   self.add_edge(node, last_def[vr], "data", vr)
-
-            # 2. Handle conflict edges (RAW)
-            if current_instruction.opcode in ["load", "output"]:
-                for mem_node in last_memory_ops:
-                    if current_instruction.opcode == "load" and mem_node.instruction.opcode == "store":
-                        self.add_edge(node, mem_node, "conflict", vr)
-                    if current_instruction.opcode == "output" and mem_node.instruction.opcode == "store":
-                        self.add_edge(node, mem_node,"conflict", vr)
-
-            # 3. Handle serial edges 
-            if current_instruction.opcode in ["store", "output"]:
-                for mem_node in last_memory_ops:
-                    # Output-output 
-                    if current_instruction.opcode == "output" and mem_node.instruction.opcode == "output":
-                        self.add_edge(node, mem_node,"serial", None)
-
-                    # Store-store 
-                    elif current_instruction.opcode == "store" and mem_node.instruction.opcode == "store":
-                        self.add_edge(node, mem_node, "serial", None)
-
-                # Add the current node to last_memory_ops as a memory operation
-                last_memory_ops.append(node)
-
-            # Move to the next instruction in the IR linked list
-            current_instruction = current_instruction.next
-    
-    def reverse_graph(self):
+        # The latest store with an unknown address (-1 if none)
+        barrier = -1
+        # Since the barrier: the latest store to each known address, the
+        # loads and outputs of each known address since its latest store,
+        # and the loads with unknown addresses
+        stores = {}
+        reads = {}
+        unknown_reads = []
+        # How many of unknown_reads the latest store to each address follows
+        reads_seen = {}
+        last_output = -1
+
+        # Operands are read from operand_rows, so the IR's instruction
+        # objects are only touched to give each Node its instruction
+        rows = zip(self.ir, self.ir.operand_rows())
+        for index, (current_instruction, (_, opcode, _, vr1, vr2, vr3)) in enumerate(rows):
+            self.nodes.append(Node(current_instruction, index))
+            address = addresses[index]
+
+            # 1. Handle regular dependencies on the virtual registers used
+            slots = USE_SLOTS[opcode]
+            if slots:
+                vrs = (vr1, vr2, vr3)
+                for slot in slots:
+                    vr = vrs[slot]
+                    if vr in last_def:
+                        self.add_edge(last_def[vr], EDGE_DATA, vr)
+
+            # The instruction is now the latest definition of its VR
+            if DEFINES_REGISTER[opcode]:
+                last_def[vr3] = index
+
+            # 2. Handle conflict edges (RAW): a read follows the stores that
+            # may write its address; the barrier precedes all of them
+            if READS_MEMORY[opcode]:
+                if address is None:
+                    writers = list(stores.values())
+                    unknown_reads.append(index)
+                else:
+                    writers = [stores[address]] if address in stores else []
+                    reads.setdefault(address, []).append(index)
+                # Every store since the barrier already follows it
+                if not writers and barrier >= 0:
+                    writers.append(barrier)
+                for store in writers:
+                    self.add_edge(store, EDGE_CONFLICT)
+
+            # 3. Handle serial edges: a store stays after every earlier memory
+            # operation on its address (WAW and WAR), and outputs stay in
+            # program order
+            if WRITES_MEMORY[opcode]:
+                if address is not None and (address in stores or len(stores) < ADDRESS_LIMIT):
+                    if address in stores:
+                        self.add_edge(stores[address], EDGE_SERIAL)
+                    elif barrier >= 0:
+                        self.add_edge(barrier, EDGE_SERIAL)
+                    for read in reads.pop(address, ()):
+                        self.add_edge(read, EDGE_SERIAL)
+                    for read in unknown_reads[reads_seen.get(address, 0):]:
+                        self.add_edge(read, EDGE_SERIAL)
+                    stores[address] = index
+                    reads_seen[address] = len(unknown_reads)
+                else:
+                    # Orders everything since the previous barrier
+                    if barrier >= 0 and not stores:
+                        self.add_edge(barrier, EDGE_SERIAL)
+                    for store in stores.values():
+                        self.add_edge(store, EDGE_SERIAL)
+                    for address_reads in reads.values():
+                        for read in address_reads:
+                            self.add_edge(read, EDGE_SERIAL)
+                    for read in unknown_reads:
+                        self.add_edge(read, EDGE_SERIAL)
+                    barrier = index
+                    stores = {}
+                    reads = {}
+                    unknown_reads = []
+                    reads_seen = {}
+            elif opcode == OP_OUTPUT:
+                if last_output >= 0:
+                    self.add_edge(last_output, EDGE_SERIAL)
+                last_output = index
+
+            # Close the node's row of successors
+            self.succ_offsets.append(len(self.succ_targets))
+
+        self.build_predecessors()
+
+    def build_predecessors(self):
         """
-        Reverse the direction of all edges in the dependence graph.
+        Fills in the pred_ arrays from the succ_ arrays with a counting sort
+        on edge targets, so each node's predecessors are in program order.
         """
-        ir = self.ir
-        res = DependenceGraph(ir)
-        res.nodes = self.nodes
-
-        # Initialize a new dictionary to hold reversed edges
-        reversed_edges = {node: [] for node in self.nodes}
+        count = len(self.nodes)
+        offsets = array('i', bytes(4 * (count + 1)))
+        for target in self.succ_targets:
+            offsets[target + 1] += 1
+        for index in range(count):
+            offsets[index + 1] += offsets[index]
+
+        edges = len(self.succ_targets)
+        targets = array('i', bytes(4 * edges))
+        kinds = array('b', bytes(edges))
+        position = offsets[:-1]
+        succ_offsets = self.succ_offsets
+        succ_targets = self.succ_targets
+        succ_kinds = self.succ_kinds
+        for source in range(count):
+            for edge in range(succ_offsets[source], succ_offsets[source + 1]):
+                target = succ_targets[edge]
+                slot = position[target]
+                targets[slot] = source
+                kinds[slot] = succ_kinds[edge]
+                position[target] = slot + 1
+
+        self.pred_offsets = offsets
+        self.pred_targets = targets
+        self.pred_kinds = kinds
+
+    def add_edge(self, target, kind, vr=NO_REGISTER):
+        """
+        Adds an edge from the node being built (the last one in nodes) to an
+        earlier node it depends on.
+        Args:
+            target (int): The id of the node depended on.
+            kind (int): EDGE_DATA, EDGE_CONFLICT or EDGE_SERIAL.
+            vr (int): The virtual register carried by a data edge.
+        """
+        self.succ_targets.append(target)
+        self.succ_kinds.append(kind)
+        self.succ_vrs.append(vr)
 
-        # Iterate over each node and its dependencies
-        for from_node in self.nodes:
-            for to_node, dep_info in self.edges[from_node]:
-                # Reverse the edge direction
-                reversed_edges[to_node].append((from_node, dep_info))
+    def edge_label(self, edge):
+        """
+        Returns the label of an edge ("data, vr12", "conflict" or "serial"),
+        given its position in succ_targets.
+        """
+        name = edge_kind_names[self.succ_kinds[edge]]
+        vr = self.succ_vrs[edge]
+        return f"{name}, vr{vr}" if vr != NO_REGISTER else name
 
-        # Replace the original edges with the reversed edges
-        res.edges = reversed_edges
+    def successors(self, index):
+        """
+        Returns the ids of the nodes that node index depends on.
+        """
+        return self.succ_targets[self.succ_offsets[index]:self.succ_offsets[index + 1]]
 
-        return res
+    def predecessors(self, index):
+        """
+        Returns the ids of the nodes that depend on node index.
+        """
+        return self.pred_targets[self.pred_offsets[index]:self.pred_offsets[index + 1]]
 
-    def add_edge(self, from_node, to_node, dep_type, vr):
-        label = f"{dep_type}, vr{vr}" if vr is not None else dep_type
-        self.edges[from_node].append((to_node, label))
+    def edge_count(self):
+        return len(self.succ_targets)
 
     def get_defs(self, instruction):
         """
@@ -105,10 +253,9 @@ class DependenceGraph:
         Returns:
             list: A list of registers defined by the instruction.
         """
-        defs = []
-        if instruction.arg3 and instruction.opcode not in ["store"]:
-            defs.append(instruction.arg3.vr)  
-        return defs
+        if DEFINES_REGISTER[instruction.opcode]:
+            return [instruction.arg3.vr]
+        return []
 
     def get_uses(self, instruction):
         """
@@ -119,129 +266,59 @@ class DependenceGraph:
         Returns:
             list: A list of registers used by the instruction.
         """
-        if instruction.opcode == 'output':
-            return []
-        
-        uses = []
-        if instruction.arg1:
-            uses.append(instruction.arg1.vr)
-        if instruction.arg2:
-            uses.append(instruction.arg2.vr)
-        if instruction.arg3 and instruction.opcode == 'store':
-            uses.append(instruction.arg3.vr)
-        return uses
+        args = (instruction.arg1, instruction.arg2, instruction.arg3)
+        return [args[slot].vr for slot in USE_SLOTS[instruction.opcode]]
 
     def calculate_priorities(self):
         """
-        Calculate the priority for each node based on dependencies.
-        The priority helps guide the scheduler to optimize execution order.
-        """
-        # Set operation latencies
-        latencies = {
-            'load': 6,
-            'store': 6,
-            'mult': 3
-        }
-
-        # Initialize incoming edges count to find root nodes
-        incoming_count = {node: 0 for node in self.nodes}
-        for from_node in self.nodes:
-            for to_node, _ in self.edges[from_node]:
-                incoming_count[to_node] += 1
-        
-        # Identify root nodes (nodes with no incoming edges)
-        root_nodes = [node for node in self.nodes if incoming_count[node] == 0]
-        
-        # Calculate the max latency-weighted path for each node starting from root nodes
-        def max_latency_path(node):
-            # Memoize result to avoid recomputation
-            if hasattr(node, 'max_latency'):  
-                return node.max_latency
-
-            # Get the latency for this operation, defaulting to 1 if not specified
-            latency = latencies.get(node.instruction.opcode, 1)
-            # Start with the latency of the current node
-            max_path = latency  
-
-            # Calculate latency-weighted path for each incoming edge and take the max
-            for from_node, _ in [(n, info) for n in self.nodes for dep, info in self.edges[n] if dep == node]:
-                max_path = max(max_path, max_latency_path(from_node) + latency)
-
-            # Store result in node attribute for memoization
-            node.max_latency = max_path  
-            return max_path
-
-        # Compute max latency-weighted path for each node
-        for node in self.nodes:
-            max_latency_path(node)
-
+        Calculate the priority for each node: the length of the longest
+        path from the node to the end of the block, counting the node's
+        latency for each data or conflict edge and SERIAL_DELAY for each
+        serial edge, and the latency of the last node on the path. A
+        node's dependents always come after it in program order, so one
+        pass over the nodes in reverse order sees every dependent before
+        the node itself, and the whole computation is O(n + e).
+        """
+        # priority collects the longest path through a node's dependents
         for node in self.nodes:
+            node.priority = 0
+
+        nodes = self.nodes
+        offsets = self.succ_offsets
+        targets = self.succ_targets
+        kinds = self.succ_kinds
+        for index in range(len(nodes) - 1, -1, -1):
+            node = nodes[index]
+            node.max_latency = max(node.priority, LATENCY[node.instruction.opcode])
             node.priority = node.max_latency
-
-        # For debugging
-        # for i, node in enumerate(self.nodes):
-        #     print(f"Node {i + 1} ({node.instruction.opcode}): Latency Priority -> {node.priority}")
+            for edge in range(offsets[index], offsets[index + 1]):
+                dep = nodes[targets[edge]]
+                if kinds[edge] == EDGE_SERIAL:
+                    path = node.max_latency + SERIAL_DELAY
+                else:
+                    path = node.max_latency + LATENCY[dep.instruction.opcode]
+                if path > dep.priority:
+                    dep.priority = path
 
     def leaf_nodes(self):
         leaves = []
+        offsets = self.succ_offsets
         for node in self.nodes:
             # Check if the node has no outgoing edges
-            if not self.edges[node]: 
+            if offsets[node.index] == offsets[node.index + 1]:
                 leaves.append(node)
                 node.status = 2
         return leaves
 
-    def save_as_dot(self, filename="dependence_graph.dot"):
+    def save_as_dot(self, filename="dependence_graph.dot", reverse=False):
         """
         Save the dependence graph in Graphviz .dot format for visualization.
         Args:
             filename (str): The name of the output .dot file.
+            reverse (bool): Draw each edge from the depended-on instruction
+                to its dependent instead (the transposed graph).
+        See graph_export for other formats, compression and subgraphs.
         """
-        with open(filename, "w") as f:
-            f.write("digraph DependenceGraph {\n")
-            
-            # Add nodes with line number, instruction, and priority
-            for i, node in enumerate(self.nodes):
-                line_number = i + 1  # Assuming line numbers start from 1
-
-                # Format instruction text based on opcode, omitting "None" values
-                if node.instruction.opcode == "loadI":
-                    # Use 'sr' for 'loadI' and skip any None values
-                    arg1_text = node.instruction.arg1.sr if node.instruction.arg1 else ""
-                    arg3_text = node.instruction.arg3.vr if node.instruction.arg3 else ""
-                    instruction_text = f"{node.instruction.opcode} {arg1_text} => {arg3_text}"
-
-                elif node.instruction.opcode == "output":
-                    # For 'output' instructions, only include non-None arguments
-                    arg1_text = node.instruction.arg1.sr if node.instruction.arg1 else ""
-                    instruction_text = f"{node.instruction.opcode} {arg1_text}"
-
-                elif node.instruction.opcode == "store":
-                    # For 'store' instructions, use 'arg1' and 'arg3' if they exist
-                    arg1_text = node.instruction.arg1.vr if node.instruction.arg1 else ""
-                    arg3_text = node.instruction.arg3.vr if node.instruction.arg3 else ""
-                    instruction_text = f"{node.instruction.opcode} {arg1_text} => {arg3_text}"
-
-                elif node.instruction.opcode == "load":
-                    # For 'load' instructions, use 'arg1' if it exists and 'arg3'
-                    arg1_text = node.instruction.arg1.vr if node.instruction.arg1 else ""
-                    arg3_text = node.instruction.arg3.vr if node.instruction.arg3 else ""
-                    instruction_text = f"{node.instruction.opcode} {arg1_text} => {arg3_text}"
-
-                else:
-                    # For other instructions, use 'vr' and handle non-None arguments
-                    arg1_text = node.instruction.arg1.vr if node.instruction.arg1 else ""
-                    arg2_text = node.instruction.arg2.vr if node.instruction.arg2 else ""
-                    arg3_text = node.instruction.arg3.vr if node.instruction.arg3 else ""
-                    instruction_text = f"{node.instruction.opcode} {arg1_text}, {arg2_text} => {arg3_text}"
-
-                # Create label with line number, instruction, and priority
-                label = f"{line_number}: {instruction_text}\\nprio: {node.priority}"
-                f.write(f'    "{id(node)}" [label="{label}"];\n')
-            
-            # Add edges with dependency type and register labels
-            for node in self.nodes:
-                for dep_node, dep_info in self.edges[node]:
-                    f.write(f'    "{id(node)}" -> "{id(dep_node)}" [label="{dep_info}"];\n')
-            
-            f.write("}\n")
+        # graph_export imports this module
+        from graph_export import export_graph
+        export_graph(self, filename, reverse=reverse)
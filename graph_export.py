@@ -0,0 +1,233 @@
+import gzip
+import json
+from dependence_graph import EDGE_SERIAL, NO_REGISTER, SERIAL_DELAY, edge_kind_names
+from opcodes import OP_LOAD, OP_STORE, OP_LOADI, OP_OUTPUT, LATENCY, opcode_names
+
+# Export formats
+FORMAT_DOT = "dot"
+FORMAT_JSONL = "jsonl"
+
+# Rows (nodes or edges) rendered per write
+EXPORT_BATCH = 4096
+
+def instruction_text(instruction):
+    """
+    Returns the text of a renamed instruction as shown in graph exports:
+    virtual registers by number, constants for loadI and output.
+    """
+    opcode = instruction.opcode
+    name = opcode_names[opcode]
+
+    # Format instruction text based on opcode, omitting "None" values
+    if opcode == OP_LOADI:
+        # Use 'sr' for 'loadI' and skip any None values
+        arg1_text = instruction.arg1.sr if instruction.arg1 else ""
+        arg3_text = instruction.arg3.vr if instruction.arg3 else ""
+        return f"{name} {arg1_text} => {arg3_text}"
+
+    if opcode == OP_OUTPUT:
+        # For 'output' instructions, only include non-None arguments
+        arg1_text = instruction.arg1.sr if instruction.arg1 else ""
+        return f"{name} {arg1_text}"
+
+    if opcode == OP_STORE or opcode == OP_LOAD:
+        # For 'load' and 'store' instructions, use 'arg1' and 'arg3' if they exist
+        arg1_text = instruction.arg1.vr if instruction.arg1 else ""
+        arg3_text = instruction.arg3.vr if instruction.arg3 else ""
+        return f"{name} {arg1_text} => {arg3_text}"
+
+    # For other instructions, use 'vr' and handle non-None arguments
+    arg1_text = instruction.arg1.vr if instruction.arg1 else ""
+    arg2_text = instruction.arg2.vr if instruction.arg2 else ""
+    arg3_text = instruction.arg3.vr if instruction.arg3 else ""
+    return f"{name} {arg1_text}, {arg2_text} => {arg3_text}"
+
+def window_selection(graph, start, stop):
+    """
+    Selects the nodes with ids in [start, stop) and the edges between them.
+
+    Returns:
+    - (nodes, edges): A bytearray with a nonzero entry per selected node id,
+      and None, meaning every edge between selected nodes.
+    """
+    count = len(graph.nodes)
+    start = max(0, min(start, count))
+    stop = max(start, min(stop, count))
+    nodes = bytearray(count)
+    nodes[start:stop] = b"\x01" * (stop - start)
+    return nodes, None
+
+def critical_selection(graph):
+    """
+    Selects the critical-path subgraph: every node on a longest path
+    through the block (weighted as in calculate_priorities), and the edges along such
+    paths. Uses the priorities set by calculate_priorities (the longest
+    path from a node to the end of the block) and one forward pass for the
+    earliest start of each node, so it is O(n + e).
+
+    Returns:
+    - (nodes, edges): Bytearrays with a nonzero entry per selected node id
+      and per selected edge (position in succ_targets).
+    """
+    nodes = graph.nodes
+    count = len(nodes)
+    offsets = graph.succ_offsets
+    targets = graph.succ_targets
+    latency = [LATENCY[node.instruction.opcode] for node in nodes]
+
+    kinds = graph.succ_kinds
+
+    # Earliest start of each node, with the edge delays the scheduler uses
+    start = [0] * count
+    for index in range(count):
+        earliest = 0
+        for edge in range(offsets[index], offsets[index + 1]):
+            target = targets[edge]
+            delay = SERIAL_DELAY if kinds[edge] == EDGE_SERIAL else latency[target]
+            if start[target] + delay > earliest:
+                earliest = start[target] + delay
+        start[index] = earliest
+
+    length = max((start[index] + nodes[index].priority for index in range(count)), default=0)
+
+    selected = bytearray(count)
+    for index in range(count):
+        if start[index] + nodes[index].priority == length:
+            selected[index] = 1
+
+    edges = bytearray(len(targets))
+    for index in range(count):
+        if not selected[index]:
+            continue
+        for edge in range(offsets[index], offsets[index + 1]):
+            target = targets[edge]
+            delay = SERIAL_DELAY if kinds[edge] == EDGE_SERIAL else latency[target]
+            if selected[target] and start[target] + delay == start[index]:
+                edges[edge] = 1
+    return selected, edges
+
+def open_output(filename, compress=None):
+    """
+    Opens filename for writing text, through gzip if compress is True or,
+    when compress is None, if the name ends in ".gz".
+    """
+    if compress is None:
+        compress = filename.endswith(".gz")
+    if compress:
+        return gzip.open(filename, "wt")
+    return open(filename, "w")
+
+def format_for(filename):
+    """
+    Returns the export format named by a file's suffix, ignoring ".gz":
+    FORMAT_JSONL for ".jsonl", FORMAT_DOT otherwise.
+    """
+    if filename.endswith(".gz"):
+        filename = filename[:-3]
+    return FORMAT_JSONL if filename.endswith(".jsonl") else FORMAT_DOT
+
+def write_graph(graph, output, export_format=FORMAT_DOT, selection=None, reverse=False,
+                batch_size=EXPORT_BATCH):
+    """
+    Streams a dependence graph to output, rendering about batch_size rows
+    per write.
+
+    The DOT format draws one node per instruction, labeled with its line
+    number, text and priority, and one labeled edge per dependence. The
+    JSON-lines format writes one object per line: nodes first,
+    {"node": id, "line": n, "op": text, "priority": p}, then edges,
+    {"edge": [source, target], "kind": name} with "vr" on data edges.
+
+    Inputs:
+    - graph (DependenceGraph): The graph, after build_graph.
+    - output: A text file-like object to write to.
+    - export_format (str): FORMAT_DOT or FORMAT_JSONL.
+    - selection (tuple): (nodes, edges) from window_selection or
+      critical_selection; None exports the whole graph.
+    - reverse (bool): Write each edge from the depended-on instruction to
+      its dependent instead (the transposed graph).
+    - batch_size (int): The number of rows to collect before writing.
+    """
+    selected_nodes, selected_edges = selection if selection is not None else (None, None)
+    dot = export_format == FORMAT_DOT
+
+    batch = []
+    if dot:
+        batch.append("digraph DependenceGraph {\n")
+
+    # Add nodes with line number, instruction, and priority
+    for index, node in enumerate(graph.nodes):
+        if selected_nodes is not None and not selected_nodes[index]:
+            continue
+        text = instruction_text(node.instruction)
+        if dot:
+            batch.append(f'    "{index}" [label="{index + 1}: {text}\\nprio: {node.priority}"];\n')
+        else:
+            batch.append(f'{{"node": {index}, "line": {index + 1}, "op": {json.dumps(text)}, "priority": {node.priority}}}\n')
+        if len(batch) >= batch_size:
+            output.write("".join(batch))
+            batch.clear()
+
+    # Add edges with dependency type and register labels
+    offsets = graph.succ_offsets
+    targets = graph.succ_targets
+    kinds = graph.succ_kinds
+    vrs = graph.succ_vrs
+    for index in range(len(graph.nodes)):
+        if selected_nodes is not None and not selected_nodes[index]:
+            continue
+        for edge in range(offsets[index], offsets[index + 1]):
+            target = targets[edge]
+            if selected_nodes is not None and not selected_nodes[target]:
+                continue
+            if selected_edges is not None and not selected_edges[edge]:
+                continue
+            source = index
+            if reverse:
+                source, target = target, source
+            if dot:
+                batch.append(f'    "{source}" -> "{target}" [label="{graph.edge_label(edge)}"];\n')
+            else:
+                kind = edge_kind_names[kinds[edge]]
+                vr = vrs[edge]
+                extra = f', "vr": {vr}' if vr != NO_REGISTER else ""
+                batch.append(f'{{"edge": [{source}, {target}], "kind": "{kind}"{extra}}}\n')
+        if len(batch) >= batch_size:
+            output.write("".join(batch))
+            batch.clear()
+
+    if dot:
+        batch.append("}\n")
+    output.write("".join(batch))
+
+def export_graph(graph, filename, export_format=None, window=None, critical=False,
+                 reverse=False, compress=None):
+    """
+    Writes a dependence graph to a file.
+
+    Inputs:
+    - graph (DependenceGraph): The graph, after build_graph (and after
+      calculate_priorities if critical is True).
+    - filename (str): The output path; a ".gz" suffix compresses it.
+    - export_format (str): FORMAT_DOT or FORMAT_JSONL; by default chosen
+      from the file suffix.
+    - window (tuple): (start, stop) to export only node ids in [start, stop).
+    - critical (bool): Export only the critical-path subgraph.
+    - reverse (bool): Write the transposed graph.
+    - compress (bool): Force gzip on or off; None decides by suffix.
+    """
+    if export_format is None:
+        export_format = format_for(filename)
+
+    selection = None
+    if critical:
+        selection = critical_selection(graph)
+    if window is not None:
+        nodes, edges = window_selection(graph, *window)
+        if selection is not None:
+            nodes = bytearray(a & b for a, b in zip(nodes, selection[0]))
+            edges = selection[1]
+        selection = nodes, edges
+
+    with open_output(filename, compress) as output:
+        write_graph(graph, output, export_format, selection, reverse)
@@ -0,0 +1,125 @@
+import heapq
+from dependence_graph import EDGE_SERIAL, SERIAL_DELAY, edge_kind_names
+from opcodes import LATENCY, UNIT, UNIT_MEMORY, UNIT_MULT
+
+# Number of longest chains reported
+TOP_CHAINS = 5
+
+# Operations the machine can issue per cycle
+ISSUE_WIDTH = 2
+
+def graph_statistics(graph, get_latency=None, top=TOP_CHAINS):
+    """
+    Summarizes a dependence graph for diagnosing schedules, in one forward
+    pass over the nodes and their edges, O(n + e).
+
+    Inputs:
+    - graph (DependenceGraph): The graph, after build_graph.
+    - get_latency: A function from a Node to its latency, such as
+      Scheduler.get_latency; defaults to the opcode latency.
+    - top (int): How many of the longest chains to report.
+
+    Cycle counts are issue cycles, the unit of the scheduler's output (one
+    entry per cycle up to the last issue): a path of operations lasts until
+    its last operation issues, not until that operation completes.
+
+    Returns:
+    - A dict that can be written as JSON:
+      - nodes, edges (int) and edges_by_kind (dict of kind name to count)
+      - critical_path (int): issue cycles on the longest path, waiting the
+        full latency on data and conflict edges and SERIAL_DELAY on serial
+        edges
+      - resource_bound (int): issue cycles needed by the issue slots and by
+        the single memory and multiply units, ignoring dependences
+      - lower_bound (int): the larger of the two bounds, which no schedule
+        of the block can beat
+      - width_profile (list): the number of operations at each level,
+        where a node's level is one more than its deepest dependence
+      - chains (list): the longest chains, longest first, as
+        {"length", "operations", "first", "last"} with length in issue
+        cycles; first and last are operation numbers, the 1-based position
+        of an operation in the block (as in the labels of graph_export),
+        which differ from source line numbers when the input has blank or
+        comment lines
+    """
+    nodes = graph.nodes
+    count = len(nodes)
+    offsets = graph.succ_offsets
+    targets = graph.succ_targets
+    kinds = graph.succ_kinds
+    if get_latency is None:
+        latency = [LATENCY[node.instruction.opcode] for node in nodes]
+    else:
+        latency = [get_latency(node) for node in nodes]
+
+    edges_by_kind = dict.fromkeys(edge_kind_names, 0)
+    for kind in graph.succ_kinds:
+        edges_by_kind[edge_kind_names[kind]] += 1
+
+    # Earliest issue cycle (from 0) and finish of each node (a serial edge
+    # releases its dependent SERIAL_DELAY cycles after the dependence
+    # issues), its level, and the dependence that releases it last (the
+    # previous node on its longest chain)
+    issue = [0] * count
+    finish = [0] * count
+    level = [0] * count
+    parent = [-1] * count
+    widths = []
+    memory_ops = 0
+    mult_ops = 0
+    for index in range(count):
+        start = 0
+        depth = 0
+        best = -1
+        for edge in range(offsets[index], offsets[index + 1]):
+            target = targets[edge]
+            if kinds[edge] == EDGE_SERIAL:
+                ready = issue[target] + SERIAL_DELAY
+            else:
+                ready = finish[target]
+            if ready > start:
+                start = ready
+                best = target
+            if level[target] + 1 > depth:
+                depth = level[target] + 1
+        issue[index] = start
+        finish[index] = start + latency[index]
+        level[index] = depth
+        parent[index] = best
+        if depth == len(widths):
+            widths.append(0)
+        widths[depth] += 1
+
+        unit = UNIT[nodes[index].instruction.opcode]
+        if unit == UNIT_MEMORY:
+            memory_ops += 1
+        elif unit == UNIT_MULT:
+            mult_ops += 1
+
+    # Issue cycles up to and including the last issue
+    critical_path = max(issue, default=-1) + 1
+    resource_bound = max(-(-count // ISSUE_WIDTH), memory_ops, mult_ops)
+
+    # Chains end at nodes nothing depends on
+    pred_offsets = graph.pred_offsets
+    sinks = (index for index in range(count) if pred_offsets[index] == pred_offsets[index + 1])
+    chains = []
+    for end in heapq.nlargest(top, sinks, key=lambda index: issue[index]):
+        first = end
+        operations = 1
+        while parent[first] >= 0:
+            first = parent[first]
+            operations += 1
+        chains.append({"length": issue[end] + 1, "operations": operations,
+                       "first": first + 1, "last": end + 1})
+
+    return {
+        "nodes": count,
+        "edges": len(targets),
+        "edges_by_kind": edges_by_kind,
+        "critical_path": critical_path,
+        "resource_bound": resource_bound,
+        "lower_bound": max(critical_path, resource_bound),
+        "width_profile": widths,
+        "chains": chains,
+    }
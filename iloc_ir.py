@@ -1,3 +1,48 @@
+from opcodes import OP_LOAD, OP_STORE, OP_LOADI, OP_OUTPUT, OP_NOP, ARITHMETIC, DEFINES_REGISTER, USE_SLOTS, REGISTER_SLOTS, opcode_names
+
+# Renaming tables are dense lists indexed by register number unless the
+# highest register number is far larger than the block needs (e.g. a single
+# use of r5000000); then a SparseRegisterMap is used and memory follows the
+# number of distinct registers instead.
+DENSE_REGISTER_LIMIT = 1 << 16
+DENSE_REGISTERS_PER_OPERATION = 4
+
+class SparseRegisterMap(dict):
+    """
+    A dict standing in for a dense renaming table: reading a register that
+    was never stored returns the table's default value without inserting it.
+
+    Attributes:
+    - default: The value of every register not in the map.
+    """
+    __slots__ = ("default",)
+
+    def __init__(self, default):
+        super().__init__()
+        self.default = default
+
+    def __missing__(self, register):
+        return self.default
+
+def register_table(max_register, count, default):
+    """
+    Creates a table mapping source register numbers to values for renaming,
+    choosing the representation from the statistics gathered while parsing.
+
+    Inputs:
+    - max_register (int): The highest register number in the block.
+    - count (int): The number of instructions in the block.
+    - default: The initial value of every register.
+
+    Returns:
+    - A list of max_register + 1 defaults when register numbers are compact
+      enough, a SparseRegisterMap otherwise. Both are indexed the same way.
+    """
+    size = max_register + 1
+    if size <= DENSE_REGISTER_LIMIT or size <= DENSE_REGISTERS_PER_OPERATION * count:
+        return [default] * size
+    return SparseRegisterMap(default)
+
 class Argument:
     """
     Represents an argument in an ILOC instruction, which could be a source register (sr), 
@@ -9,6 +54,8 @@ class Argument:
     - vr (int): Virtual register.
     - nu (int): Next-use information for register allocation.
     """
+    __slots__ = ("sr", "pr", "vr", "nu")
+
     def __init__(self, sr = None, pr = None, vr = None, nu = None):
         # Initialize the source register (sr)
         if sr is not None:
@@ -34,6 +81,35 @@ class Argument:
         else:
             self.nu = None
 
+def format_instruction(opcode, sr1, vr1, vr2, vr3):
+    """
+    Formats an instruction from its operands, as printed in schedules:
+    the constant of loadI and output, virtual registers otherwise.
+    Operands that are None are left out.
+    """
+    name = opcode_names[opcode].ljust(8)
+
+    # Handle argument formatting
+    if opcode == OP_LOADI:
+        arg1 = sr1 if sr1 is not None else ""
+    elif opcode == OP_OUTPUT:
+        arg1 = str(sr1) if sr1 is not None else ""
+    else:
+        arg1 = f"r{vr1}" if vr1 is not None else ""
+
+    arg2 = f"r{vr2}" if vr2 is not None else ""
+    arg3 = f"r{vr3}" if vr3 is not None else ""
+
+    # Format for `=>` when there is a destination register
+    if arg3:
+        return f"{name}{arg1}{f', {arg2}' if arg2 else ''} => {arg3}"
+    elif arg2:
+        return f"{name}{arg1}, {arg2}"
+    elif arg1:
+        return f"{name}{arg1}"
+    else:
+        return name
+
 class ILOCNode:
     """
     Represents a node in the Intermediate Representation (IR) linked list.
@@ -44,17 +120,21 @@ class ILOCNode:
     - arg1 (Argument): The first operand (could be source or destination).
     - arg2 (Argument): The second operand (optional).
     - arg3 (Argument): The third operand (destination or store source).
-    - opcode (str): The ILOC operation code (e.g., "load", "add").
+    - opcode (int): The ILOC operation code as an opcodes.OP_* number.
     - prev (ILOCNode): The previous node in the linked list.
     - next (ILOCNode): The next node in the linked list.
+    - line_number (int): Position in the list, set by rename_registers.
     """
-    def __init__(self, arg1: Argument, arg2: Argument, arg3: Argument, opcode: str):
+    __slots__ = ("arg1", "arg2", "arg3", "prev", "next", "opcode", "line_number")
+
+    def __init__(self, arg1: Argument, arg2: Argument, arg3: Argument, opcode: int):
         self.arg1 = arg1
         self.arg2 = arg2
         self.arg3 = arg3
         self.prev = None
         self.next = None
         self.opcode = opcode
+        self.line_number = None
 
     def format_operand(self, operand):
         """
@@ -79,26 +159,7 @@ class ILOCNode:
         Outputs:
         - A string showing the opcode and its operands formatted nicely.
         """
-        # Handle argument formatting
-        if self.opcode == "loadI":
-            arg1 = self.arg1.sr if self.arg1 and self.arg1.sr is not None else ""
-        elif self.opcode == "output":
-            arg1 = str(self.arg1.sr) if self.arg1 and self.arg1.sr is not None else ""
-        else:
-            arg1 = f"r{self.arg1.vr}" if self.arg1 and self.arg1.vr is not None else ""
-
-        arg2 = f"r{self.arg2.vr}" if self.arg2 and self.arg2.vr is not None else ""
-        arg3 = f"r{self.arg3.vr}" if self.arg3 and self.arg3.vr is not None else ""
-
-        # Format for `=>` when there is a destination register
-        if arg3:
-            return f"{self.opcode.ljust(8)}{arg1}{f', {arg2}' if arg2 else ''} => {arg3}"
-        elif arg2:
-            return f"{self.opcode.ljust(8)}{arg1}, {arg2}"
-        elif arg1:
-            return f"{self.opcode.ljust(8)}{arg1}"
-        else:
-            return self.opcode.ljust(8)
+        return format_instruction(self.opcode, self.arg1.sr, self.arg1.vr, self.arg2.vr, self.arg3.vr)
         
     def max_sr(self):
         """
@@ -111,10 +172,10 @@ class ILOCNode:
         """
         args = [self.arg1, self.arg2, self.arg3]
 
-        if self.opcode == "nop":
+        if self.opcode == OP_NOP:
             return 0
 
-        elif self.opcode == "loadI":
+        elif self.opcode == OP_LOADI:
             # For loadI, we are only concerned with the destination register
             return args[2].sr 
 
@@ -134,6 +195,9 @@ class ILOCLinkedList:
     Attributes:
     - head: The first node in the linked list.
     - tail: The last node in the linked list.
+    - count (int): The number of nodes in the list.
+    - max_register (int): The highest source register named by any register
+      operand added with add_instruction or append, -1 if there is none.
     """
     def __init__(self):
         """
@@ -141,6 +205,31 @@ class ILOCLinkedList:
         """
         self.head = None
         self.tail = None
+        self.count = 0
+        self.max_register = -1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        node = self.head
+        while node is not None:
+            yield node
+            node = node.next
+
+    def operand_rows(self, reverse=False):
+        """
+        Yields the operands of every instruction as a tuple, for passes that
+        only read them: (line_number, opcode, sr1, vr1, vr2, vr3), where sr1
+        is the constant of loadI and output. Unused operands are None.
+
+        Inputs:
+        - reverse (bool): Start from the tail instead of the head.
+        """
+        node = self.tail if reverse else self.head
+        while node is not None:
+            yield (node.line_number, node.opcode, node.arg1.sr, node.arg1.vr, node.arg2.vr, node.arg3.vr)
+            node = node.prev if reverse else node.next
 
     def add_instruction(self, node: ILOCNode):
         """
@@ -149,6 +238,13 @@ class ILOCLinkedList:
         Inputs:
         - node (ILOCNode): The instruction node to add.
         """
+        self.count += 1
+        args = (node.arg1, node.arg2, node.arg3)
+        for slot in REGISTER_SLOTS[node.opcode]:
+            sr = args[slot].sr
+            if sr is not None and sr > self.max_register:
+                self.max_register = sr
+
         if self.tail is None:
             self.head = self.tail = node
         else:
@@ -156,6 +252,46 @@ class ILOCLinkedList:
             node.prev = self.tail 
             self.tail = node
 
+    def append(self, opcode, sr1=None, sr2=None, sr3=None):
+        """
+        Adds a new instruction with the given source registers (or constants)
+        to the end of the linked list.
+
+        Inputs:
+        - opcode (int): The ILOC operation code (opcodes.OP_*).
+        - sr1, sr2, sr3: The source registers or constant of each operand, or None.
+        """
+        self.add_instruction(ILOCNode(arg1=Argument(sr=sr1), arg2=Argument(sr=sr2), arg3=Argument(sr=sr3), opcode=opcode))
+
+    def extend_columns(self, opcodes, sr):
+        """
+        Appends a run of instructions given as columns, e.g. the arrays a
+        parse worker returns.
+
+        Inputs:
+        - opcodes: The opcode number of every instruction.
+        - sr: The sr column of each operand slot; negative values mark unused operands.
+        """
+        append = self.append
+        for opcode, sr1, sr2, sr3 in zip(opcodes, *sr):
+            append(opcode,
+                   sr1 if sr1 >= 0 else None,
+                   sr2 if sr2 >= 0 else None,
+                   sr3 if sr3 >= 0 else None)
+
+    def insert_before(self, new_node: ILOCNode, existing_node: ILOCNode):
+        """
+        Inserts new_node before existing_node in the linked list.
+        """
+        self.count += 1
+        if existing_node.prev is not None:
+            existing_node.prev.next = new_node
+            new_node.prev = existing_node.prev
+        new_node.next = existing_node
+        existing_node.prev = new_node
+        if self.head == existing_node:
+            self.head = new_node
+
     def print_instructions(self):
         """
         Prints all ILOC instructions in the linked list.
@@ -166,120 +302,76 @@ class ILOCLinkedList:
             print(current) 
             current = current.next
     
-    def max_sr(self):
-        """
-        Returns the maximum source register (sr) used in the entire linked list.
-        This is used for register allocation purposes.
-        """
-        node = self.head
-        max_sr = 0
-
-        while node:
-            max_sr = max(max_sr, node.max_sr())
-            node = node.next
-        
-        return max_sr
-    
     def rename_registers(self):
         """
-        Renames virtual registers (VR) to optimize register allocation using a next-use analysis.
-        
+        Renames source registers to virtual registers (VR) with a next-use
+        analysis, in a single backward pass over the prev links. The tables
+        are chosen by register_table from max_register and count, so no
+        pre-scan of the list is needed.
+        Also numbers the nodes in list order (line_number).
+
         Returns:
         - max_vr (int): The highest virtual register used.
-        - live (int): The maximum number of live registers during the renaming process.
+        - max_live (int): MAXLIVE, the largest number of virtual registers
+          live at the same time (a value defined and never used counts at
+          its definition).
         """
-        # Tracks MAXLIVE value
-        MAXLIVE = 0
-        # Assume 2x source registers for safety
-        max_reg = self.max_sr() * 2
+        # Unmapped source registers hold -1, registers with no later use infinity
+        infinity = float('inf')
+        sr_to_vr = register_table(self.max_register, self.count, -1)
+        lu = register_table(self.max_register, self.count, infinity)
 
-        # Initializations
         max_vr = -1
-        sr_to_vr = [None] * (max_reg + 1) 
-        lu = [float('inf')] * (max_reg + 1)
-
-        # Track live registers
         live = 0
+        max_live = 0
 
-        # Step 1: Traverse the linked list to collect instructions
-        instructions = []
-        curr_node = self.head
+        position = self.count - 1
+        node = self.tail
+        while node is not None:
+            opcode = node.opcode
+            node.line_number = position
 
-        idx = 0
-        while curr_node:
-            instructions.append(curr_node)
-            curr_node.line_number = idx
-            idx += 1
-            curr_node = curr_node.next
-
-        idx = len(instructions) - 1
-
-        # Step 2: Process each instruction from last to first
-        while idx >= 0:
-            curr_instr = instructions[idx]
-            
-            # Extract source registers
-            sr1 = curr_instr.arg1.sr
-            sr2 = curr_instr.arg2.sr
-            sr3 = curr_instr.arg3.sr
-
-            # Definition cases
-            if sr3 != None and curr_instr.opcode != "store":
-                if sr_to_vr[sr3] == None:
-                    max_vr += 1
-                    sr_to_vr[sr3] = max_vr
-                    live += 1
-
-                live -= 1
-                curr_instr.arg3.vr = sr_to_vr[sr3]
-                curr_instr.arg3.nu = lu[sr3]
-                sr_to_vr[sr3] = None
-                lu[sr3] = float('inf')
-
-            # Use cases
-            if sr1 != None and curr_instr.opcode != "loadI" and curr_instr.opcode != "output":
-                live += 1
-                if sr_to_vr[sr1] == None:
+            # Definition: the value is not live above this operation
+            if DEFINES_REGISTER[opcode]:
+                arg = node.arg3
+                sr = arg.sr
+                vr = sr_to_vr[sr]
+                if vr == -1:
+                    # Never used, but it still occupies a register here
                     max_vr += 1
-                    sr_to_vr[sr1] = max_vr
-                curr_instr.arg1.vr = sr_to_vr[sr1]
-                curr_instr.arg1.nu = lu[sr1]
+                    vr = max_vr
+                    if live + 1 > max_live:
+                        max_live = live + 1
+                else:
+                    live -= 1
+                arg.vr = vr
+                arg.nu = lu[sr]
+                sr_to_vr[sr] = -1
+                lu[sr] = infinity
 
-            if sr2 != None:
-                live += 1
-                if sr_to_vr[sr2] == None:
-                    max_vr += 1
-                    sr_to_vr[sr2] = max_vr
-                    live += 1
-
-                curr_instr.arg2.vr = sr_to_vr[sr2]
-                curr_instr.arg2.nu = lu[sr2]
-
-            # Operand 3 for store is always a use case
-            if sr3 != None and curr_instr.opcode == "store":
-                live += 1
-                if sr_to_vr[sr3] == None:
-                    max_vr += 1
-                    sr_to_vr[sr3] = max_vr
-                curr_instr.arg3.vr = sr_to_vr[sr3]
-                curr_instr.arg3.nu = lu[sr3]
-            
-            if sr1 != None and curr_instr.opcode != 'loadI':
-                lu[sr1] = idx
-
-            if sr2 != None:
-                lu[sr2] = idx
-            
-            if sr3 != None:
-                if curr_instr.opcode == "store":
-                    lu[sr3] = idx
-            
-            if live > MAXLIVE:
-                MAXLIVE = live
+            # Uses: the value is live from its definition to here
+            slots = USE_SLOTS[opcode]
+            if slots:
+                args = (node.arg1, node.arg2, node.arg3)
+                for slot in slots:
+                    arg = args[slot]
+                    sr = arg.sr
+                    vr = sr_to_vr[sr]
+                    if vr == -1:
+                        max_vr += 1
+                        vr = sr_to_vr[sr] = max_vr
+                        live += 1
+                    arg.vr = vr
+                    arg.nu = lu[sr]
+                for slot in slots:
+                    lu[args[slot].sr] = position
+                if live > max_live:
+                    max_live = live
 
-            idx -= 1
+            position -= 1
+            node = node.prev
 
-        return max_vr, live
+        return max_vr, max_live
 
     def print_renamed_ILOC(self):
         """
@@ -287,17 +379,17 @@ class ILOCLinkedList:
         """
         curr = self.head
         while curr is not None:
-            if curr.opcode == 'store':
-                print(f"{curr.opcode}\t r{curr.arg1.pr} => r{curr.arg3.pr}")
-            if curr.opcode == 'load':
-                print(f"{curr.opcode}\t r{curr.arg1.pr} => r{curr.arg3.pr}")
-            elif curr.opcode == 'loadI':
-                print(f"{curr.opcode}\t {curr.arg1.sr} => r{curr.arg3.pr}")
-            elif curr.opcode in ['add', 'sub', 'mult', 'lshift', 'rshift']:
-                print(f"{curr.opcode}\t r{curr.arg1.pr}, r{curr.arg2.pr} => r{curr.arg3.pr}")
-            elif curr.opcode == 'output':
-                print(f"{curr.opcode}\t {curr.arg1.sr}")
-            elif curr.opcode == 'nop':
+            opcode = curr.opcode
+            name = opcode_names[opcode]
+            if opcode == OP_LOAD or opcode == OP_STORE:
+                print(f"{name}\t r{curr.arg1.pr} => r{curr.arg3.pr}")
+            elif opcode == OP_LOADI:
+                print(f"{name}\t {curr.arg1.sr} => r{curr.arg3.pr}")
+            elif opcode in ARITHMETIC:
+                print(f"{name}\t r{curr.arg1.pr}, r{curr.arg2.pr} => r{curr.arg3.pr}")
+            elif opcode == OP_OUTPUT:
+                print(f"{name}\t {curr.arg1.sr}")
+            elif opcode == OP_NOP:
                 print(f"nop")
             curr = curr.next
 
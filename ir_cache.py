@@ -0,0 +1,174 @@
+import hashlib
+import os
+import struct
+import tempfile
+from array import array
+from columnar_ir import ColumnarIR
+
+# Bumped whenever the file layout or the meaning of a column changes; files
+# written with another version are treated as misses and removed.
+FORMAT_VERSION = 2
+
+MAGIC = b"ILIR"
+# magic, format version, rows, operation count, max_vr, max_live
+HEADER = struct.Struct("<4sIIIii")
+
+SUFFIX = ".ir"
+
+# Default bound on the total size of the cache directory
+DEFAULT_MAX_BYTES = 256 << 20
+
+def cache_key(data):
+    """
+    Returns the cache key for an input: the SHA-256 of its contents.
+
+    Inputs:
+    - data: A bytes-like object (bytes or mmap) holding the whole input.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+class IRCache:
+    """
+    An on-disk cache of renamed IRs, keyed by the hash of the input file.
+    Each entry is one file holding a header followed by the opcode, sr, vr
+    and nu columns of a ColumnarIR in list order. Columns are written in the
+    machine's native byte order, so a cache directory should not be shared
+    between machines of different endianness.
+
+    The directory is kept under max_bytes by evicting the least recently
+    used entries; a hit refreshes the entry's modification time.
+
+    Attributes:
+    - directory (str): Where the entries are stored.
+    - max_bytes (int): The bound on the total size of all entries.
+    """
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, key, columnar=True):
+        """
+        Reads a cached IR.
+
+        Inputs:
+        - key (str): The cache key of the input.
+        - columnar (bool): Return a ColumnarIR if True, an ILOCLinkedList otherwise.
+
+        Returns:
+        - (ir, operation_count, (max_vr, max_live)) on a hit, None on a miss.
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(HEADER.size)
+                if len(header) != HEADER.size:
+                    raise ValueError("truncated header")
+                magic, version, rows, operation_count, max_vr, max_live = HEADER.unpack(header)
+                if magic != MAGIC or version != FORMAT_VERSION:
+                    raise ValueError("stale format")
+
+                opcodes = array('b')
+                opcodes.fromfile(f, rows)
+                columns = []
+                for typecode in 'qqqiiiiii':
+                    column = array(typecode)
+                    column.fromfile(f, rows)
+                    columns.append(column)
+        except FileNotFoundError:
+            return None
+        except (ValueError, EOFError, struct.error):
+            # Stale or damaged entry
+            self.remove(path)
+            return None
+
+        ir = ColumnarIR()
+        ir.extend_columns(opcodes, tuple(columns[0:3]), tuple(columns[3:6]), tuple(columns[6:9]))
+        os.utime(path)
+
+        if not columnar:
+            ir = ir.to_linked_list()
+        return ir, operation_count, (max_vr, max_live)
+
+    def store(self, key, ir, operation_count, renamed):
+        """
+        Writes a renamed IR to the cache and evicts old entries if the cache
+        has grown past max_bytes. Must be called before any instruction is
+        inserted into the IR (e.g. spill code). An IR with a constant or
+        register too large for the cached columns is not stored.
+
+        Inputs:
+        - key (str): The cache key of the input.
+        - ir (ILOCLinkedList or ColumnarIR): The renamed IR.
+        - operation_count (int): The number of successfully parsed operations.
+        - renamed (tuple): The (max_vr, max_live) result of rename_registers.
+        """
+        try:
+            columns = compact(ir)
+        except OverflowError:
+            return
+        rows = len(columns)
+        max_vr, max_live = renamed
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, FORMAT_VERSION, rows, operation_count, max_vr, max_live))
+                columns.opcodes.tofile(f)
+                for column in columns.sr + columns.vr + columns.nu:
+                    column.tofile(f)
+            # Readers never see a partly written entry
+            os.replace(temp_path, self.path(key))
+        except OSError:
+            self.remove(temp_path)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes.
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+            total += info.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= size
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def compact(ir):
+    """
+    Returns a ColumnarIR whose rows are the instructions of ir in list order,
+    copying only when ir is a linked list or its rows are out of order.
+    """
+    if isinstance(ir, ColumnarIR) and ir.order() == array('i', range(len(ir))):
+        return ir
+
+    columns = ColumnarIR()
+    node = ir.head
+    while node is not None:
+        columns.add_instruction(node)
+        node = node.next
+    return columns
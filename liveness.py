@@ -0,0 +1,149 @@
+from array import array
+from opcodes import DEFINES_REGISTER, USE_SLOTS
+
+# A live set is saved every CHECKPOINT_INTERVAL instructions; live sets at
+# other instructions are rebuilt from the next checkpoint on demand.
+CHECKPOINT_INTERVAL = 64
+
+# Entry of the defined and used columns where an instruction has no VR
+NO_VR = -1
+
+def to_bitset(registers):
+    """
+    Returns an int with bit vr set for every virtual register in registers.
+    """
+    bits = 0
+    for vr in registers:
+        bits |= 1 << vr
+    return bits
+
+class Liveness:
+    """
+    Liveness of the virtual registers in a renamed block, computed in one
+    backward pass over the IR's operand_rows. Per-instruction counts are
+    kept in compact arrays indexed by the instruction's line_number (its
+    position in a freshly renamed IR); live sets are rebuilt from
+    checkpoints when asked for.
+
+    Attributes:
+    - live_in (array): Number of VRs live before each instruction.
+    - live_out (array): Number of VRs live after each instruction.
+    - pressure (array): Registers needed by each instruction: the larger of
+      live_in and live_out, counting a defined value that is never used.
+    - max_live (int): MAXLIVE, the largest pressure in the block.
+    - defined (array): The VR each instruction defines, NO_VR if none.
+    - used (tuple of array): The first and second VR each instruction uses, NO_VR if none.
+    - checkpoints (dict): Maps a line number to the VRs live after it.
+    - last (int): The line number of the last instruction, -1 for an empty block.
+    """
+    def __init__(self, ir):
+        """
+        Inputs:
+        - ir (ILOCLinkedList or ColumnarIR): The IR, after rename_registers.
+        """
+        size = len(ir)
+        self.live_in = array('i', bytes(4 * size))
+        self.live_out = array('i', bytes(4 * size))
+        self.pressure = array('i', bytes(4 * size))
+        self.defined = array('i', [NO_VR]) * size
+        self.used = (array('i', [NO_VR]) * size, array('i', [NO_VR]) * size)
+        self.max_live = 0
+        self.checkpoints = {}
+        self.last = -1
+
+        live = set()
+        for index, opcode, _, vr1, vr2, vr3 in ir.operand_rows(reverse=True):
+            if self.last < 0:
+                self.last = index
+            if index % CHECKPOINT_INTERVAL == CHECKPOINT_INTERVAL - 1 or index == self.last:
+                self.checkpoints[index] = tuple(live)
+
+            live_out = len(live)
+            # A value that is never used still needs a register where it is defined
+            dead = 0
+            if DEFINES_REGISTER[opcode]:
+                self.defined[index] = vr3
+                if vr3 not in live:
+                    dead = 1
+                live.discard(vr3)
+            slots = USE_SLOTS[opcode]
+            if slots:
+                vrs = (vr1, vr2, vr3)
+                for position, slot in enumerate(slots):
+                    self.used[position][index] = vrs[slot]
+                    live.add(vrs[slot])
+            live_in = len(live)
+
+            pressure = max(live_in, live_out + dead)
+            self.live_in[index] = live_in
+            self.live_out[index] = live_out
+            self.pressure[index] = pressure
+            if pressure > self.max_live:
+                self.max_live = pressure
+
+    def transfer(self, index, live):
+        """
+        Applies one instruction backwards to a live set: removes the virtual
+        register it defines and adds the ones it uses.
+
+        Inputs:
+        - index (int): The instruction's line_number.
+        - live (set): The virtual registers live after the instruction; updated in place.
+        """
+        if self.defined[index] != NO_VR:
+            live.discard(self.defined[index])
+        for column in self.used:
+            if column[index] != NO_VR:
+                live.add(column[index])
+
+    def change(self, index):
+        """
+        Returns how much the instruction changes the number of live VRs
+        (negative if it ends more live ranges than it starts).
+        """
+        return self.live_out[index] - self.live_in[index]
+
+    def live_after(self, index):
+        """
+        Rebuilds the set of VRs live after an instruction from the nearest
+        checkpoint at or after it.
+
+        Inputs:
+        - index (int): The instruction's line_number.
+
+        Returns:
+        - The set of VRs live after the instruction.
+        """
+        checkpoint = min(self.last, index - index % CHECKPOINT_INTERVAL + CHECKPOINT_INTERVAL - 1)
+        live = set(self.checkpoints[checkpoint])
+        while checkpoint > index:
+            self.transfer(checkpoint, live)
+            checkpoint -= 1
+        return live
+
+    def live_out_set(self, index):
+        """
+        Returns the VRs live after an instruction as a bitset (bit vr set).
+        """
+        return to_bitset(self.live_after(index))
+
+    def live_in_set(self, index):
+        """
+        Returns the VRs live before an instruction as a bitset (bit vr set).
+        """
+        live = self.live_after(index)
+        self.transfer(index, live)
+        return to_bitset(live)
+
+    def dump(self, output):
+        """
+        Writes the pressure curve, one "line_number pressure live_in live_out"
+        row per instruction, after a MAXLIVE comment line.
+
+        Inputs:
+        - output: A text file-like object to write to.
+        """
+        rows = [f"// MAXLIVE = {self.max_live}\n"]
+        for index in range(len(self.pressure)):
+            rows.append(f"{index} {self.pressure[index]} {self.live_in[index]} {self.live_out[index]}\n")
+        output.write("".join(rows))
@@ -1,9 +1,14 @@
 import sys
 from allocator import Allocator
-from scanner import scan, category_names, EOF
-from parser_1 import parse, errors, print_ir
+from scanner import open_input, read_chunks, dump_tokens
+from parser_1 import Parser
 from iloc_ir import ILOCLinkedList
+from columnar_ir import ColumnarIR
+from ir_cache import IRCache, cache_key
 from contextlib import redirect_stdout
+import io
+import json
+import mmap
 import os 
 
 """
@@ -12,7 +17,10 @@ Lab 3 sim:
 """
 # Import dependencies for Lab 3
 from dependence_graph import DependenceGraph
+from graph_export import export_graph
+from graph_stats import graph_statistics
 from scheduler import Scheduler  
+from liveness import Liveness
 
 # Logging for Lab 2
 def get_log_name(input_path):
@@ -40,6 +48,20 @@ def print_help():
         -r <name>    parses and renames the input file, prints the renamed IR.
         -x <name>    renames and prints the results to stdout (Code Check 1 only).
         -d <name>    performs dependence graph construction and scheduling.
+        --pressure <name>  renames and prints the register pressure at every operation
+                     ("index pressure live_in live_out"), after a MAXLIVE line.
+        --columnar   stores the IR in typed columns (ColumnarIR) instead of a linked list.
+        -j <n>       parses large inputs (1 MiB or more) in n worker processes.
+        --cache <dir> keeps renamed IRs in <dir>, keyed by a hash of the input, and
+                     reuses them on later runs of the same block.
+        --graph <file> with -d, also writes the dependence graph to <file>: Graphviz
+                     .dot, or JSON lines for a .jsonl name; a .gz suffix compresses it.
+        --graph-window <start>:<stop>  exports only operations start to stop-1
+                     (counted from 0) and the edges between them.
+        --critical   exports only the critical-path subgraph.
+        --stats      with -d, writes dependence-graph statistics (edge counts, critical
+                     path, resource bound, width profile, longest chains) and the
+                     schedule length, all in issue cycles, to stderr as one line of JSON.
     
     Format:
         k <name>     where k is the number of registers available to the allocator (3 ≤ k ≤ 64)
@@ -60,15 +82,52 @@ def main():
     input_file = None
     num_registers = None
     flag = None
+    columnar = False
+    workers = 1
+    cache_dir = None
+    graph_file = None
+    graph_window = None
+    critical = False
+    stats = False
 
     # Parse command-line arguments
-    for arg in sys.argv[1:]:
+    args = iter(sys.argv[1:])
+    for arg in args:
         if arg.startswith('-'):
             if arg == '-h':
                 print_help()
                 sys.exit(0)
-            elif arg in ['-s', '-p', '-r', '-x', '-d']:
+            elif arg in ['-s', '-p', '-r', '-x', '-d', '--pressure']:
                 flag = arg
+            elif arg == '--columnar':
+                columnar = True
+            elif arg == '-j':
+                value = next(args, '')
+                if not value.isdigit() or int(value) < 1:
+                    print(f"ERROR: Invalid number of workers '{value}'. Must be at least 1.")
+                    sys.exit(1)
+                workers = int(value)
+            elif arg == '--cache':
+                cache_dir = next(args, None)
+                if not cache_dir:
+                    print("ERROR: Missing cache directory after '--cache'.")
+                    sys.exit(1)
+            elif arg == '--graph':
+                graph_file = next(args, None)
+                if not graph_file:
+                    print("ERROR: Missing output file after '--graph'.")
+                    sys.exit(1)
+            elif arg == '--graph-window':
+                value = next(args, '')
+                start, _, stop = value.partition(':')
+                if not (start.isdigit() and stop.isdigit()):
+                    print(f"ERROR: Invalid graph window '{value}'. Expected <start>:<stop>.")
+                    sys.exit(1)
+                graph_window = (int(start), int(stop))
+            elif arg == '--critical':
+                critical = True
+            elif arg == '--stats':
+                stats = True
             else:
                 print(f"ERROR: Unrecognized flag '{arg}'")
                 sys.exit(1)
@@ -86,53 +145,76 @@ def main():
         sys.exit(1)
 
     try:
-        with open(input_file, 'r') as file:
+        # Large regular files are scanned in place through mmap, pipes are streamed
+        with open(input_file, 'r') as file, open_input(file) as source:
             # If '-s' flag is used, scan and print all tokens
             if flag == '-s':
                 print("Scanning tokens...")
-                while True:
-                    token = scan(file)
-                    if token[1] == category_names[EOF]:
-                        print(f"{token[0]}: < {token[1]}, \"{token[2]}\" >")
-                        break
-                    elif token[1] == 'REG':
-                        print(f"{token[0]}: < {token[1]}, \"r{token[2]}\" >")
-                        continue
-                    print(f"{token[0]}: < {token[1]}, \"{token[2]}\" >")
+                sys.stdout.flush()
+                dump_tokens(source, sys.stdout.buffer)
+                sys.stdout.buffer.flush()
                 return
 
-            # Parse the input file and handle flags '-r', '-x'
-            ir, operation_count = parse(file)
-
-            # Check if there are any errors in parsing
-            if errors:
-                print("Parsing failed. Errors found:", file=sys.stderr)
-                print("\n".join(errors), file=sys.stderr)
-                sys.exit(1)
-            
             # Default to '-d' if no valid flag is provided
             if flag is None:
                 flag = '-d'
 
+            # The result of rename_registers, once the IR has been renamed
+            renamed = None
+            ir = None
+
+            # Every pass but '-r' works on the renamed IR, which can come from the cache
+            cache = IRCache(cache_dir) if cache_dir and flag != '-r' else None
+            if cache is not None:
+                if not isinstance(source, mmap.mmap):
+                    source = io.BytesIO(b"".join(read_chunks(source)))
+                key = cache_key(source if isinstance(source, mmap.mmap) else source.getbuffer())
+                cached = cache.load(key, columnar)
+                if cached is not None:
+                    ir, operation_count, renamed = cached
+
+            if ir is None:
+                # Parse the input file and handle flags '-r', '-x'
+                parser = Parser(ColumnarIR() if columnar else None)
+                if workers > 1:
+                    ir, operation_count = parser.parse_parallel(source, workers)
+                else:
+                    ir, operation_count = parser.parse(source)
+
+                # Check if there are any errors in parsing
+                if parser.errors:
+                    print("Parsing failed. Errors found:", file=sys.stderr)
+                    print("\n".join(parser.errors), file=sys.stderr)
+                    sys.exit(1)
+
+                if cache is not None:
+                    renamed = ir.rename_registers()
+                    cache.store(key, ir, operation_count, renamed)
+
             # If '-r' flag is used, print the IR
             if flag == '-r':
                 print("Intermediate Representation (IR):")
-                print_ir()
+                parser.print_ir()
 
             # If '-x' flag is used, perform Code Check 1
             elif flag == '-x':
-                ir.rename_registers()
+                if renamed is None:
+                    renamed = ir.rename_registers()
                 ir.print_renamed_ILOC()
                 
+            # If '--pressure' is used, print the register-pressure curve
+            elif flag == '--pressure':
+                if renamed is None:
+                    renamed = ir.rename_registers()
+                Liveness(ir).dump(sys.stdout)
+
             # If num_registers is used, perform Code Check 2
             elif num_registers:
-                # Number of registers passed from command-line
-                num_registers = int(sys.argv[1]) 
-                 # Filepath passed from the command-line
-                filepath = sys.argv[2] 
+                # Filepath passed from the command-line
+                filepath = input_file
                 
                 # Create an instance of Allocator with the number of registers and the input file path
-                allocator = Allocator(num_registers, ir)
+                allocator = Allocator(num_registers, ir, renamed)
 
                 # Perform register allocation
                 allocator.allocate_registers()
@@ -148,18 +230,18 @@ def main():
             # If '-d' flag is used, perform dependence graph construction and scheduling
             elif flag == '-d':
                 # Step 1: Rename the registers
-                ir.rename_registers()
+                if renamed is None:
+                    renamed = ir.rename_registers()
                 
                 # Step 2: Build the dependence graph
                 dependence_graph = DependenceGraph(ir)
                 dependence_graph.build_graph()
-                # dependence_graph.calculate_priorities()  
+                dependence_graph.calculate_priorities()
+                if graph_file is not None:
+                    export_graph(dependence_graph, graph_file, window=graph_window, critical=critical)
                
-                # Step 3: Build and save the transpose of the dependence graph
-                dg = dependence_graph.reverse_graph()
-                
-                # Step 4: Schedule the instructions
-                scheduler = Scheduler(dependence_graph, dg)
+                # Step 3: Schedule the instructions
+                scheduler = Scheduler(dependence_graph, Liveness(ir))
                 schedule = scheduler.schedule_operations()
                 # Format the schedule into reference-style output
                 formatted_schedule = scheduler.format_schedule()
@@ -167,6 +249,11 @@ def main():
                 # Print the formatted schedule
                 for cycle_output in formatted_schedule:
                     print(cycle_output)
+
+                if stats:
+                    report = graph_statistics(dependence_graph, scheduler.get_latency)
+                    report["scheduled_cycles"] = len(schedule)
+                    print(json.dumps(report), file=sys.stderr)
             
             # If no valid flag or number of registers is provided, show an error
             else:
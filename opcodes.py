@@ -0,0 +1,44 @@
+# ILOC opcodes, interned to small integers at parse time. Every pass
+# dispatches on these numbers and the property tables below instead of
+# comparing opcode strings.
+
+OP_LOAD = 0
+OP_STORE = 1
+OP_LOADI = 2
+OP_ADD = 3
+OP_SUB = 4
+OP_MULT = 5
+OP_LSHIFT = 6
+OP_RSHIFT = 7
+OP_OUTPUT = 8
+OP_NOP = 9
+
+opcode_names = [
+    "load", "store", "loadI", "add", "sub", "mult", "lshift", "rshift", "output", "nop"
+]
+
+# Opcode number for each opcode spelling
+opcode_numbers = {name: number for number, name in enumerate(opcode_names)}
+
+# Functional-unit classes: at most one MEMORY and one MULT operation issue per cycle
+UNIT_ANY = 0
+UNIT_MEMORY = 1
+UNIT_MULT = 2
+
+# Per-opcode property tables, indexed by opcode number
+#                 load  store  loadI  add  sub  mult  lshift rshift output nop
+LATENCY =        [6,    6,     1,     1,   1,   3,    1,     1,     1,     1]
+DEFINES_REGISTER = [True, False, True, True, True, True, True, True, False, False]
+READS_MEMORY =   [True, False, False, False, False, False, False, False, True, False]
+WRITES_MEMORY =  [False, True, False, False, False, False, False, False, False, False]
+UNIT = [UNIT_MEMORY, UNIT_MEMORY, UNIT_ANY, UNIT_ANY, UNIT_ANY, UNIT_MULT, UNIT_ANY, UNIT_ANY, UNIT_ANY, UNIT_ANY]
+
+# Operand slots (0: arg1, 1: arg2, 2: arg3) that hold registers read or
+# written by each opcode
+USE_SLOTS = [(0,), (0, 2), (), (0, 1), (0, 1), (0, 1), (0, 1), (0, 1), (), ()]
+DEF_SLOTS = [(2,), (), (2,), (2,), (2,), (2,), (2,), (2,), (), ()]
+# All register operands (uses and definitions)
+REGISTER_SLOTS = [(0, 2), (0, 2), (2,), (0, 1, 2), (0, 1, 2), (0, 1, 2), (0, 1, 2), (0, 1, 2), (), ()]
+
+# Opcodes written as "op r1, r2 => r3"
+ARITHMETIC = (OP_ADD, OP_SUB, OP_MULT, OP_LSHIFT, OP_RSHIFT)
@@ -1,5 +1,11 @@
-from scanner import scan, category_names
+import io
+import mmap
+import re
+from concurrent.futures import ProcessPoolExecutor
+from scanner import Scanner, read_chunks, category_names, INVALID
 from iloc_ir import Argument, ILOCLinkedList, ILOCNode
+from columnar_ir import ColumnarIR
+from opcodes import OP_LOAD, OP_STORE, OP_LOADI, OP_OUTPUT, OP_NOP, USE_SLOTS, DEF_SLOTS, opcode_numbers
 
 # Categories
 MEMOP = 0
@@ -14,287 +20,526 @@ INTO = 8
 EOF = 9
 EOL = 10
 
-curr_line = None
-curr_lexeme = None
-curr_token = None
-# List to store error messages
-errors = []  
-# Intermediate representation (IR) to store parsed instructions
+# Category names for error messages; invalid words are reported as ERROR tokens
+token_names = category_names[:INVALID] + ["ERROR"]
+
+# Whitespace and end-of-line comment as accepted by the scanner
+WS = rb"[ \t\r\x0b\x0c]"
+COMMENT = rb"(?://[^\n]*)?"
+
+# Fast path: one well-formed operation (or a blank/comment line) per line.
+# Lines that do not match are handed to the recursive-descent parser.
+FAST_LINE = re.compile(
+    rb"^" + WS + rb"*(?:"
+    rb"(load|store)" + WS + rb"+r([0-9]+)" + WS + rb"*=>" + WS + rb"*r([0-9]+)"
+    rb"|loadI" + WS + rb"*([0-9]+)" + WS + rb"*=>" + WS + rb"*r([0-9]+)"
+    rb"|(add|sub|mult|lshift|rshift)" + WS + rb"+r([0-9]+)" + WS + rb"*," + WS + rb"*r([0-9]+)"
+    + WS + rb"*=>" + WS + rb"*r([0-9]+)"
+    rb"|output" + WS + rb"*([0-9]+)"
+    rb"|(nop)"
+    rb")?" + WS + rb"*" + COMMENT + rb"$\n?",
+    re.MULTILINE
+)
+
+# Opcode numbers keyed by the raw bytes of the opcode, for the fast path
+opcode_bytes = {name.encode(): number for name, number in opcode_numbers.items()}
+
+# Inputs smaller than this are parsed in-process even when workers are requested
+PARALLEL_THRESHOLD = 1 << 20
+# Pieces per worker, so a slow piece does not leave the other workers idle
+PIECES_PER_WORKER = 4
+
+# List to store error messages from the module-level parse() wrapper
+errors = []
+# Intermediate representation (IR) from the module-level parse() wrapper
 ir = ILOCLinkedList()
 
-def print_ir():
+class Parser:
     """
-    Prints the IR (Intermediate Representation) if it has been populated with instructions.
-    If no IR has been generated, prints a message indicating so.
-    """
-    global ir
-    if ir and ir.head: 
-        # Calls the print method of the IR linked list
-        ir.print_instructions()
-    else:
-        print("No IR generated.")
+    Parses one ILOC block into an ILOCLinkedList. All parsing state lives in
+    the instance, so separate Parsers can work on different blocks at the
+    same time.
 
-def next_token(input_stream):
+    Attributes:
+    - errors (list): Error messages found while parsing.
+    - ir (ILOCLinkedList or ColumnarIR): The instructions parsed so far.
+    - scanner (Scanner): The scanner for the input currently being parsed.
+    - curr_line, curr_token, curr_lexeme: The current token (line number,
+      integer category and lexeme bytes, as returned by Scanner.scan_code).
     """
-    Retrieves the next token from the input stream using the scanner.
-    Automatically skips newlines and handles errors in lexemes.
+    def __init__(self, ir=None):
+        """
+        Inputs:
+        - ir: The IR to append instructions to (an empty ILOCLinkedList by
+          default; a ColumnarIR works as well).
+        """
+        self.errors = []
+        self.ir = ir if ir is not None else ILOCLinkedList()
+        self.scanner = None
+        self.curr_line = None
+        self.curr_token = None
+        self.curr_lexeme = None
 
-    Inputs:
-    - input_stream: The input file stream to read from.
+    def print_ir(self):
+        """
+        Prints the IR (Intermediate Representation) if it has been populated with instructions.
+        If no IR has been generated, prints a message indicating so.
+        """
+        if self.ir and self.ir.head:
+            # Calls the print method of the IR linked list
+            self.ir.print_instructions()
+        else:
+            print("No IR generated.")
 
-    Outputs:
-    - The current line, token, and lexeme. If the token is EOF, returns None.
-    """
-    global curr_line, curr_lexeme, curr_token
-    while True:
-        result = scan(input_stream)
+    def next_token(self):
+        """
+        Retrieves the next token from the input stream using the scanner.
+        Automatically skips newlines and handles errors in lexemes.
+
+        Outputs:
+        - The current line, token, and lexeme. If the token is EOF, returns None.
+        """
+        self.curr_line, self.curr_token, self.curr_lexeme = self.scanner.scan_code()
         # Handle invalid words
-        if isinstance(result, tuple) and result[0] == "ERROR":  
-            curr_line, curr_token, curr_lexeme = result[1], "ERROR", result[2]
-            errors.append(f"ERROR {curr_line}: \"{curr_lexeme}\" is not a valid word.")
+        if self.curr_token == INVALID:
+            self.errors.append(f"ERROR {self.curr_line}: \"{self.curr_lexeme.decode()}\" is not a valid word.")
             # Report error but don't skip the line
-            return curr_line, curr_token, curr_lexeme  
+            return self.curr_line, self.curr_token, self.curr_lexeme
+        # End of file
+        if self.curr_token == EOF:
+            return None
+        return self.curr_line, self.curr_token, self.curr_lexeme
+
+    def parse_memop(self):
+        """
+        Parses memory operations (MEMOP) such as load or store.
+        Expects MEMOP REG INTO REG.
+
+        Outputs:
+        - True if the MEMOP is successfully parsed.
+        - False and logs an error if the expected tokens (REGISTER, INTO, REGISTER) are not found.
+        """
+        opcode = self.curr_lexeme
+        self.next_token()
+        if self.curr_token == REGISTER:
+            src_register = self.curr_lexeme
+            self.next_token()
+            if self.curr_token == INTO:
+                self.next_token()
+                if self.curr_token == REGISTER:
+                    dest_register = self.curr_lexeme
+
+                    if opcode == b"load":
+                        node = ILOCNode(arg1=Argument(sr=src_register), arg2=Argument(), arg3=Argument(sr = dest_register), opcode=OP_LOAD)
+                        self.ir.add_instruction(node)
+                    elif opcode == b"store":
+                        self.ir.add_instruction(ILOCNode(arg1=Argument(sr=src_register), arg2=Argument(), arg3=Argument(sr = dest_register), opcode=OP_STORE))
+                    else:
+                        self.errors.append(f"ERROR {self.curr_line}: Unrecognized memory operation '{opcode.decode()}'.")
+
+                    self.next_token()
+
+                    if self.curr_token != EOF and self.curr_token != EOL:
+                        self.errors.append(f"ERROR {self.curr_line}: Extra token at end of line \"{self.curr_lexeme.decode()}\" ({token_names[self.curr_token]}).")
+                    return True
+                else:
+
+                    self.errors.append(f"ERROR {self.curr_line}: Missing target register in load or store.")
+            else:
+                self.errors.append(f"ERROR {self.curr_line}: Missing '=>' in load or store.")
         else:
-            curr_line, curr_token, curr_lexeme = result
-            # End of file
-            if curr_token == category_names[EOF]:
-                return None  
-            return curr_line, curr_token, curr_lexeme
-    
-def parse_memop(input_stream):
-    """
-    Parses memory operations (MEMOP) such as load or store.
-    Expects MEMOP REG INTO REG.
+            self.errors.append(f"ERROR {self.curr_line}: Missing source register in load or store.")
+        return False
 
-    Inputs:
-    - input_stream: A file-like object representing the input file for the scanner.
+    def parse_load_i(self):
+        """
+        Parses the LOADI operation.
+        Expects LOADI CONSTANT INTO REG.
 
-    Outputs:
-    - True if the MEMOP is successfully parsed.
-    - False and logs an error if the expected tokens (REGISTER, INTO, REGISTER) are not found.
-    """
-    opcode = curr_lexeme
-    next_token(input_stream)
-    if curr_token == category_names[REGISTER]:
-        src_register = curr_lexeme
-        next_token(input_stream)
-        if curr_token == category_names[INTO]:
-            next_token(input_stream)
-            if curr_token == category_names[REGISTER]:
-                dest_register = curr_lexeme
-
-                if opcode == "load":
-                    node = ILOCNode(arg1=Argument(sr=src_register), arg2=Argument(), arg3=Argument(sr = dest_register), opcode="load")
-                    ir.add_instruction(node)
-                elif opcode == "store":
-                    ir.add_instruction(ILOCNode(arg1=Argument(sr=src_register), arg2=Argument(), arg3=Argument(sr = dest_register), opcode="store" ))
+        Outputs:
+        - True if the LOADI operation is successfully parsed.
+        - False and logs an error if the expected tokens (CONSTANT, INTO, REGISTER) are not found.
+        """
+        self.next_token()
+        if self.curr_token == CONSTANT:
+            constant_value = self.curr_lexeme
+            self.next_token()
+            if self.curr_token == INTO:
+                self.next_token()
+                if self.curr_token == REGISTER:
+                    dest_register = self.curr_lexeme
+                    self.ir.add_instruction(ILOCNode(arg1=Argument(sr=constant_value), arg2=Argument(), arg3=Argument(sr = dest_register), opcode=OP_LOADI))
+                    self.next_token()
+                    # Check if there are extra tokens after the instruction
+                    if self.curr_token != EOF and self.curr_token != EOL:
+                        self.errors.append(f"ERROR {self.curr_line}: Extra token at end of line \"{self.curr_lexeme.decode()}\" ({token_names[self.curr_token]}).")
+                    # Successful parsing
+                    return True
                 else:
-                    errors.append(f"ERROR {curr_line}: Unrecognized memory operation '{opcode}'.")
+                    self.errors.append(f"ERROR {self.curr_line}: Missing target register in load or store.")
+            else:
+                self.errors.append(f"ERROR {self.curr_line}: Missing '=>' in loadI.")
+        else:
+            self.errors.append(f"ERROR {self.curr_line}: Missing constant in loadI.")
+        return False
 
-                next_token(input_stream)
+    def parse_arithop(self):
+        """
+        Parses arithmetic operations (ARITHOP), such as add, sub, or mult.
+        Expects ARITHOP REG COMMA REG INTO REG.
 
-                if curr_token not in [category_names[EOF], category_names[EOL]]:
-                    errors.append(f"ERROR {curr_line}: Extra token at end of line \"{curr_lexeme}\" ({curr_token}).")
-                return True 
+        Outputs:
+        - True if the ARITHOP is successfully parsed.
+        - False and logs an error if the expected tokens (REGISTER, COMMA, REGISTER, INTO, REGISTER) are not found.
+        """
+        opcode = self.curr_lexeme
+        self.next_token()
+        if self.curr_token == REGISTER:
+            src1_register = self.curr_lexeme
+            self.next_token()
+            if self.curr_token == COMMA:
+                self.next_token()
+                if self.curr_token == REGISTER:
+                    src2_register = self.curr_lexeme
+                    self.next_token()
+                    if self.curr_token == INTO:
+                        self.next_token()
+                        if self.curr_token == REGISTER:
+                            dest_register = self.curr_lexeme
+                            self.ir.add_instruction(ILOCNode(arg1=Argument(sr=src1_register), arg2=Argument(src2_register), arg3=Argument(sr = dest_register), opcode=opcode_bytes[opcode]))
+                            self.next_token()
+                            # Check if there are extra tokens after the instruction
+                            if self.curr_token != EOF and self.curr_token != EOL:
+                                self.errors.append(f"ERROR {self.curr_line}: Extra token at end of line \"{self.curr_lexeme.decode()}\" ({token_names[self.curr_token]}).")
+                            # Successful parsing
+                            return True
+                        else:
+                            self.errors.append(f"ERROR {self.curr_line}: Missing target register in mult.")
+                    else:
+                        self.errors.append(f"ERROR {self.curr_line}: Missing '=>' after second .")
+                else:
+                    self.errors.append(f"ERROR {self.curr_line}: Missing second source register in add.")
             else:
+                self.errors.append(f"ERROR {self.curr_line}: Missing comma in add.")
+        else:
+            self.errors.append(f"ERROR {self.curr_line}: Missing first souce register in add.")
+        return False
+
+    def parse_output(self):
+        """
+        Parses the OUTPUT operation.
+        Expects OUTPUT CONSTANT.
 
-                errors.append(f"ERROR {curr_line}: Missing target register in load or store.")
+        Outputs:
+        - True if the OUTPUT operation is successfully parsed.
+        - False and logs an error if a constant is not found after the OUTPUT keyword.
+        """
+        self.next_token()
+        if self.curr_token == CONSTANT:
+            output_value = self.curr_lexeme
+            self.ir.add_instruction(ILOCNode(arg1=Argument(sr=output_value), arg2=Argument(), arg3=Argument(), opcode=OP_OUTPUT))
+            self.next_token()
+            # Check if there are extra tokens after the instruction
+            if self.curr_token != EOF and self.curr_token != EOL:
+                self.errors.append(f"ERROR {self.curr_line}: Extra token at end of line \"{self.curr_lexeme.decode()}\" ({token_names[self.curr_token]}).")
+            # Successful parsing
+            return True
         else:
-            errors.append(f"ERROR {curr_line}: Missing '=>' in load or store.")
-    else:
-        errors.append(f"ERROR {curr_line}: Missing source register in load or store.")
-    return False
+            self.errors.append(f"ERROR {self.curr_line}: Missing constant in output.")
+        return False
 
-def parse_load_i(input_stream):
-    """
-    Parses the LOADI operation. 
-    Expects LOADI CONSTANT INTO REG.
+    def parse_nop(self):
+        """
+        Parses the NOP (No Operation) command.
+        Expects NOP.
 
-    Inputs:
-    - input_stream: A file-like object representing the input file for the scanner.
+        Outputs:
+        - True indicating that the NOP operation is successfully parsed.
+        """
+        self.next_token()
+        self.ir.add_instruction(ILOCNode(arg1=Argument(), arg2=Argument(), arg3=Argument(), opcode = OP_NOP))
+        # NOP is always successfully parsed
+        return True
 
-    Outputs:
-    - True if the LOADI operation is successfully parsed.
-    - False and logs an error if the expected tokens (CONSTANT, INTO, REGISTER) are not found.
-    """
-    next_token(input_stream)
-    if curr_token == category_names[CONSTANT]:
-        constant_value = curr_lexeme
-        next_token(input_stream)
-        if curr_token == category_names[INTO]:
-            next_token(input_stream)
-            if curr_token == category_names[REGISTER]:
-                dest_register = curr_lexeme
-                ir.add_instruction(ILOCNode(arg1=Argument(sr=constant_value), arg2=Argument(), arg3=Argument(sr = dest_register), opcode="loadI"))
-                next_token(input_stream)
-                # Check if there are extra tokens after the instruction
-                if curr_token not in [category_names[EOF], category_names[EOL]]:
-                    errors.append(f"ERROR {curr_line}: Extra token at end of line \"{curr_lexeme}\" ({curr_token}).")
-                # Successful parsing
-                return True 
-            else:
-                errors.append(f"ERROR {curr_line}: Missing target register in load or store.")
-        else:
-            errors.append(f"ERROR {curr_line}: Missing '=>' in loadI.")
-    else:
-        errors.append(f"ERROR {curr_line}: Missing constant in loadI.")
-    return False
+    def parse_tokens(self, input_stream, line_number=1):
+        """
+        Recursive-descent parse of every operation in the input stream, appending
+        instructions to the IR and errors to the error list.
 
-def parse_arithop(input_stream):
-    """
-    Parses arithmetic operations (ARITHOP), such as add, sub, or mult.
-    Expects ARITHOP REG COMMA REG INTO REG.
+        Inputs:
+        - input_stream: A file-like object representing the input file for the scanner.
+        - line_number: The line number of the first line in the stream.
 
-    Inputs:
-    - input_stream: A file-like object representing the input file for the scanner.
+        Outputs:
+        - The number of successfully parsed operations.
+        """
+        self.scanner = Scanner(input_stream, line_number)
+        # Keeps track of successfully parsed operations
+        operation_count = 0
 
-    Outputs:
-    - True if the ARITHOP is successfully parsed.
-    - False and logs an error if the expected tokens (REGISTER, COMMA, REGISTER, INTO, REGISTER) are not found.
-    """
-    opcode = curr_lexeme
-    next_token(input_stream)
-    if curr_token == category_names[REGISTER]:
-        src1_register = curr_lexeme
-        next_token(input_stream)
-        if curr_token == category_names[COMMA]:
-            next_token(input_stream)
-            if curr_token == category_names[REGISTER]:
-                src2_register = curr_lexeme
-                next_token(input_stream)
-                if curr_token == category_names[INTO]:
-                    next_token(input_stream)
-                    if curr_token == category_names[REGISTER]:
-                        dest_register = curr_lexeme
-                        ir.add_instruction(ILOCNode(arg1=Argument(sr=src1_register), arg2=Argument(src2_register), arg3=Argument(sr = dest_register), opcode=opcode))
-                        next_token(input_stream)
-                        # Check if there are extra tokens after the instruction
-                        if curr_token not in [category_names[EOF], category_names[EOL]]:
-                            errors.append(f"ERROR {curr_line}: Extra token at end of line \"{curr_lexeme}\" ({curr_token}).")
-                        # Successful parsing
-                        return True  
-                    else:
-                        errors.append(f"ERROR {curr_line}: Missing target register in mult.")
-                else:
-                    errors.append(f"ERROR {curr_line}: Missing '=>' after second .")
+        def handle_production():
+            """Helper function to handle the production rules for parsing."""
+            nonlocal operation_count
+            if self.curr_token == MEMOP:
+                if self.parse_memop():
+                    operation_count += 1
+            elif self.curr_token == LOADI:
+                if self.parse_load_i():
+                    operation_count += 1
+            elif self.curr_token == ARITHOP:
+                if self.parse_arithop():
+                    operation_count += 1
+            elif self.curr_token == OUTPUT:
+                if self.parse_output():
+                    operation_count += 1
+            elif self.curr_token == NOP:
+                if self.parse_nop():
+                    operation_count += 1
+            elif self.curr_token == REGISTER or self.curr_token == CONSTANT:
+                self.next_token()
+
+        self.next_token()
+
+        try:
+            while self.curr_token != EOF:
+                handle_production()
+                self.next_token()
+        except OverflowError:
+            # A value too large for a ColumnarIR column; see parse_chunk
+            raise
+        except Exception as e:
+            self.errors.append(f"Unexpected Error: {e}")
+        return operation_count
+
+    def parse_lines(self, chunk, line_number):
+        """
+        Parses a line-aligned chunk of bytes one line at a time with FAST_LINE.
+        Runs of lines that do not match are re-scanned and parsed by parse_tokens,
+        so their error messages are the same as the recursive-descent parser's.
+
+        Inputs:
+        - chunk: A bytes-like object (bytes, mmap or memoryview) holding whole
+          lines of the input. Only the lines that need the fallback parser are
+          copied out of it.
+        - line_number: The line number of the first line in the chunk.
+
+        Outputs:
+        - The number of successfully parsed operations and the line number
+          following the last line of the chunk.
+        """
+        operation_count = 0
+        append = self.ir.append
+        end = len(chunk)
+        pos = 0
+
+        for m in FAST_LINE.finditer(chunk):
+            start = m.start()
+            if start == end:
+                break
+
+            # Lines skipped over by the search did not match the fast path
+            if start != pos:
+                lines = bytes(chunk[pos:start])
+                operation_count += self.parse_tokens(io.BytesIO(lines), line_number)
+                line_number += lines.count(b"\n")
+
+            pos = m.end()
+            line_number += 1
+            group = m.lastindex
+
+            if group is None:
+                # Blank or comment-only line
+                continue
+            elif group == 3:
+                append(opcode_bytes[m.group(1)], int(m.group(2)), None, int(m.group(3)))
+            elif group == 5:
+                append(OP_LOADI, int(m.group(4)), None, int(m.group(5)))
+            elif group == 9:
+                append(opcode_bytes[m.group(6)], int(m.group(7)), int(m.group(8)), int(m.group(9)))
+            elif group == 10:
+                append(OP_OUTPUT, int(m.group(10)))
             else:
-                errors.append(f"ERROR {curr_line}: Missing second source register in add.")
+                append(OP_NOP)
+            operation_count += 1
+
+        if pos < end:
+            lines = bytes(chunk[pos:end])
+            operation_count += self.parse_tokens(io.BytesIO(lines), line_number)
+            line_number += lines.count(b"\n")
+
+        return operation_count, line_number
+
+    def parse_chunk(self, chunk, line_number):
+        """
+        Parses a line-aligned chunk like parse_lines. If a constant or register
+        in the chunk does not fit the typed columns of a ColumnarIR, the IR is
+        copied into an ILOCLinkedList, which has no such limit, and the chunk
+        is parsed again from its first line.
+
+        Inputs and outputs are those of parse_lines.
+        """
+        if not isinstance(self.ir, ColumnarIR):
+            return self.parse_lines(chunk, line_number)
+
+        rows = len(self.ir)
+        errors = len(self.errors)
+        try:
+            return self.parse_lines(chunk, line_number)
+        except OverflowError:
+            # Drop what the chunk added so far and continue in a linked list
+            self.ir.truncate(rows)
+            del self.errors[errors:]
+            self.ir = self.ir.to_linked_list()
+            return self.parse_lines(chunk, line_number)
+
+    def parse(self, input_stream):
+        """
+        Parses an input stream into this parser's IR.
+        Well-formed lines take the FAST_LINE path; everything else goes through
+        the recursive-descent routines.
+
+        Inputs:
+        - input_stream: A file-like object or mmap representing the input file.
+
+        Outputs:
+        - The IR and the number of successfully parsed operations. Errors are
+          collected in self.errors.
+        """
+        # Keeps track of successfully parsed operations
+        operation_count = 0
+        line_number = 1
+
+        for chunk in read_chunks(input_stream):
+            count, line_number = self.parse_chunk(chunk, line_number)
+            operation_count += count
+
+        return self.ir, operation_count
+
+    def parse_parallel(self, input_stream, workers, threshold=PARALLEL_THRESHOLD):
+        """
+        Parses an input stream by splitting it at line boundaries and parsing
+        the pieces in a pool of worker processes. Each worker returns its
+        instructions as columnar arrays, which are stitched onto this parser's
+        IR in input order; error messages carry global line numbers because
+        every piece is parsed with the line number it starts on.
+
+        Inputs:
+        - input_stream: A file-like object or mmap representing the input file.
+        - workers: The number of worker processes.
+        - threshold: Inputs with fewer bytes are parsed in-process with parse().
+
+        Outputs:
+        - The IR and the number of successfully parsed operations. Errors are
+          collected in self.errors.
+        """
+        if isinstance(input_stream, mmap.mmap):
+            data = input_stream
         else:
-            errors.append(f"ERROR {curr_line}: Missing comma in add.")
-    else:
-        errors.append(f"ERROR {curr_line}: Missing first souce register in add.")
-    return False
+            data = b"".join(read_chunks(input_stream))
+
+        if workers <= 1 or len(data) < threshold:
+            operation_count, _ = self.parse_chunk(data, 1)
+            return self.ir, operation_count
+
+        pieces = []
+        line_numbers = []
+        line_number = 1
+        for start, end in split_lines(data, workers * PIECES_PER_WORKER):
+            piece = data[start:end]
+            pieces.append(piece)
+            line_numbers.append(line_number)
+            line_number += piece.count(b"\n")
+
+        operation_count = 0
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for opcodes, sr, errors, count in pool.map(parse_piece, pieces, line_numbers):
+                    self.ir.extend_columns(opcodes, sr)
+                    self.errors.extend(errors)
+                    operation_count += count
+        except OverflowError:
+            # A piece holds a value too large for the workers' columns: start
+            # over in-process, where parse_chunk can fall back to a linked list
+            self.ir = type(self.ir)()
+            self.errors.clear()
+            operation_count, _ = self.parse_chunk(data, 1)
+
+        return self.ir, operation_count
 
-def parse_output(input_stream):
+def split_lines(data, pieces):
     """
-    Parses the OUTPUT operation.
-    Expects OUTPUT CONSTANT.
+    Splits a buffer into about equal slices that each end on a line boundary.
 
     Inputs:
-    - input_stream: A file-like object representing the input file for the scanner.
+    - data: A bytes-like object (bytes or mmap) holding the input.
+    - pieces: The number of slices wanted.
 
-    Outputs:
-    - True if the OUTPUT operation is successfully parsed.
-    - False and logs an error if a constant is not found after the OUTPUT keyword.
+    Returns:
+    - A list of (start, end) offsets covering the whole buffer in order.
     """
-    next_token(input_stream)
-    if curr_token == category_names[CONSTANT]:
-        output_value = curr_lexeme
-        ir.add_instruction(ILOCNode(arg1=Argument(sr=output_value), arg2=Argument(), arg3=Argument(), opcode="output"))
-        next_token(input_stream)
-        # Check if there are extra tokens after the instruction
-        if curr_token not in [category_names[EOF], category_names[EOL]]:
-                    errors.append(f"ERROR {curr_line}: Extra token at end of line \"{curr_lexeme}\" ({curr_token}).")
-        # Successful parsing
-        return True  
-    else:
-        errors.append(f"ERROR {curr_line}: Missing constant in output.")
-    return False
+    size = len(data)
+    step = max(1, size // max(1, pieces))
+    bounds = []
+    start = 0
+    while start < size:
+        end = data.find(b"\n", min(start + step, size) - 1)
+        end = size if end == -1 else end + 1
+        bounds.append((start, end))
+        start = end
+    return bounds
 
-def parse_nop(input_stream):
+def parse_piece(piece, line_number):
     """
-    Parses the NOP (No Operation) command.
-    Expects NOP.
+    Worker for Parser.parse_parallel: parses a line-aligned piece of the input
+    into a ColumnarIR.
 
     Inputs:
-    - input_stream: A file-like object representing the input file for the scanner.
+    - piece: The bytes of whole input lines.
+    - line_number: The line number of the first line in the piece.
 
-    Outputs:
-    - True indicating that the NOP operation is successfully parsed.
+    Returns:
+    - The opcode array, the tuple of sr arrays, the error messages and the
+      number of successfully parsed operations.
     """
-    next_token(input_stream)
-    ir.add_instruction(ILOCNode(arg1=Argument(), arg2=Argument(), arg3=Argument(), opcode = "nop"))
-    # NOP is always successfully parsed
-    return True 
+    parser = Parser(ColumnarIR())
+    count, _ = parser.parse_lines(piece, line_number)
+    return parser.ir.opcodes, parser.ir.sr, parser.errors, count
 
-def find_use_defs(node: ILOCNode):
-    
-    if node.opcode == 'store':
-        uses = [node.arg1, node.arg3]
-        defs = []
-    
-    elif node.opcode == 'loadI':
-        uses = []
-        defs = [node.arg3]
-    
-    elif node.opcode == 'nop' or node.opcode == 'output':
-        uses = []
-        defs = []
-    
+def print_ir():
+    """
+    Prints the IR produced by the module-level parse() wrapper.
+    If no IR has been generated, prints a message indicating so.
+    """
+    if ir and ir.head:
+        # Calls the print method of the IR linked list
+        ir.print_instructions()
     else:
-        uses = [node.arg1, node.arg2]
-        defs = [node.arg3]
-    
+        print("No IR generated.")
+
+def find_use_defs(node: ILOCNode):
+    """
+    Returns the operands of node that are register uses and register definitions,
+    looked up in the opcode's USE_SLOTS and DEF_SLOTS.
+    """
+    args = (node.arg1, node.arg2, node.arg3)
+    uses = [args[slot] for slot in USE_SLOTS[node.opcode]]
+    defs = [args[slot] for slot in DEF_SLOTS[node.opcode]]
     return uses, defs
 
 def parse(input_stream):
     """
     Main parsing function that takes an input stream, processes it, and prints the results.
+    Compatibility wrapper around Parser: the IR is kept in the module-level ir
+    and errors are appended to the module-level errors list.
 
     Inputs:
     - input_stream: A file-like object representing the input file for the scanner.
 
     Outputs:
-    - If errors are found, prints the list of errors followed by "Parse found errors."
-    - If no errors are found, prints "Parse succeeded. Processed X operations."
+    - The IR and the number of successfully parsed operations.
     """
-    global errors, ir
-    global curr_line, curr_token, curr_lexeme
-    ir = ILOCLinkedList()
-    # Keeps track of successfully parsed operations
-    operation_count = 0
-
-    # Reset the IR for new parsing
-    ir = ILOCLinkedList()
-
-    def handle_production():
-        """Helper function to handle the production rules for parsing."""
-        nonlocal operation_count
-        if curr_token == category_names[MEMOP]:
-            if parse_memop(input_stream):
-                operation_count += 1
-        elif curr_token == category_names[LOADI]:
-            if parse_load_i(input_stream):
-                operation_count += 1
-        elif curr_token == category_names[ARITHOP]:
-            if parse_arithop(input_stream):
-                operation_count += 1
-        elif curr_token == category_names[OUTPUT]:
-            if parse_output(input_stream):
-                operation_count += 1
-        elif curr_token == category_names[NOP]:
-            if parse_nop(input_stream):
-                operation_count += 1
-        elif curr_token == category_names[REGISTER] or curr_token == category_names[CONSTANT]:
-            next_token(input_stream)
-    
-    next_token(input_stream)  
-    
-    try:
-        while curr_token != category_names[EOF]:
-            handle_production()  
-            next_token(input_stream)
-        return ir, operation_count
-    except Exception as e:
-        errors.append(f"Unexpected Error: {e}")
-        return ir, operation_count
+    global ir
+    parser = Parser()
+    ir, operation_count = parser.parse(input_stream)
+    errors.extend(parser.errors)
+    return ir, operation_count
@@ -1,6 +1,8 @@
-import sys
-
-BUFFER_SIZE = 4096
+import contextlib
+import mmap
+import os
+import re
+import stat
 
 # Categories
 MEMOP = 0
@@ -35,179 +37,273 @@ patterns = {
     'nop': NOP
 }
 
-# Global variables
-buffer = []
-input_pointer = 0
-line_number = 1
+# Bytes read from the input stream per chunk
+CHUNK_SIZE = 1 << 16
+
+# Tokens rendered per write by dump_tokens
+DUMP_BATCH = 4096
+
+# Regular files at least this large are scanned in place through mmap
+MMAP_THRESHOLD = 1 << 20
+
+# Token grammar, compiled once into the regex engine's automaton. A single
+# findall over a chunk returns every lexeme span in the chunk, so the scanner
+# never walks the input one character at a time in Python.
+LEXEME_PATTERN = re.compile(
+    rb"r[0-9]+"                # register
+    rb"|[A-Za-z]+"             # keyword (or an invalid word)
+    rb"|[0-9]+"                # constant
+    rb"|=>"                    # into
+    rb"|//[^\n]*\n?"           # comment, including its newline
+    rb"|[^ \t\r\x0b\x0c]"       # any other single byte, including newline
+)
+
+# Lexemes whose category is fixed, mapped to (category, lexeme)
+fixed_lexemes = {word.encode(): (category, word) for word, category in patterns.items()}
+fixed_lexemes[b","] = (COMMA, ",")
+fixed_lexemes[b"=>"] = (INTO, "=>")
+fixed_lexemes[b"\n"] = (EOL, "\\n")
+
+ALPHA_BYTES = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+# Byte-class table indexed by the first byte of every other lexeme
+byte_class = [INVALID] * 256
+for byte in b"0123456789":
+    byte_class[byte] = CONSTANT
+byte_class[ord("r")] = REGISTER
+byte_class[ord("/")] = EOL
+
+# Scanner used by the module-level scan() wrapper
+default_scanner = None
 
-def fill_buffer(input_stream):
+def map_input(input_stream):
     """
-    Fills the buffer with data from the input stream.
+    Memory-maps the file behind input_stream if it is a regular file of at
+    least MMAP_THRESHOLD bytes.
 
     Inputs:
     - input_stream: A file-like object representing the input file.
-    
+
     Returns:
-    - True if data was successfully read into the buffer.
-    - False if the input stream has no more data (EOF).
+    - A read-only mmap of the whole file, or None if the stream should be read
+      in chunks instead (pipes, terminals, small files).
     """
-    global buffer
-    # Read next chunk into the buffer
-    buffer = list(input_stream.read(BUFFER_SIZE))  
-    # Return True if buffer has data, False if EOF
-    return len(buffer) > 0  
+    try:
+        fd = input_stream.fileno()
+    except (AttributeError, OSError):
+        return None
 
+    info = os.fstat(fd)
+    if not stat.S_ISREG(info.st_mode) or info.st_size < MMAP_THRESHOLD:
+        return None
+    return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
 
-def next_char(input_stream):
+def open_input(input_stream):
     """
-    Retrieves the next character from the buffer and advances the input pointer.
-    Optimized to minimize buffer refills and handle buffer efficiently.
-    
+    Chooses the input mode for a stream: an mmap for large regular files,
+    the stream itself otherwise. Either one can be passed to scan() and parse().
+
     Inputs:
     - input_stream: A file-like object representing the input file.
 
     Returns:
-    - The next character from the buffer, or None if EOF.
+    - A context manager that yields the input source and releases the mapping on exit.
     """
-    global input_pointer, buffer
+    mapped = map_input(input_stream)
+    if mapped is None:
+        return contextlib.nullcontext(input_stream)
+    return mapped
 
-    # If we've reached the end of the current buffer, refill the buffer
-    if input_pointer >= len(buffer):
-        contents = fill_buffer(input_stream)
-        # Attempt to refill the buffer
-        if not contents:
-            return None  # Return None if there's no more data to read (EOF)
-        input_pointer = 0  # Reset input pointer after buffer refill
+def read_chunks(input_stream, chunk_size=CHUNK_SIZE):
+    """
+    Reads the input stream as raw bytes in chunks that end on a line boundary,
+    so that no token is ever split between two chunks. A memory-mapped file
+    is scanned in place: its chunks are memoryview windows over the mapping,
+    each released when the next one is requested.
 
-    # Return the next character and increment the pointer
-    char = buffer[input_pointer]
-    input_pointer += 1
-    return char
+    Inputs:
+    - input_stream: A file-like object or mmap representing the input file.
+    - chunk_size: The number of bytes to request per read (for an mmap, the
+      size of a window before it is extended to the end of its last line).
 
-def rollback():
-    """
-    Moves the input pointer back by one character in the buffer.
+    Returns:
+    - A generator of bytes-like objects. Every chunk but the last ends in a newline.
     """
-    global input_pointer
-    if input_pointer > 0:
-        input_pointer -= 1
+    if isinstance(input_stream, mmap.mmap):
+        size = len(input_stream)
+        start = 0
+        with memoryview(input_stream) as view:
+            while start < size:
+                end = input_stream.find(b"\n", start + chunk_size - 1)
+                end = size if end == -1 else end + 1
+                with view[start:end] as window:
+                    yield window
+                start = end
+        return
 
-def scan(input_stream):
+    # Text-mode files expose the underlying binary stream as .buffer
+    raw = getattr(input_stream, 'buffer', input_stream)
+    carry = b""
+
+    while True:
+        data = raw.read(chunk_size)
+        if not data:
+            break
+        if isinstance(data, str):
+            data = data.encode()
+
+        cut = data.rfind(b"\n") + 1
+        if cut == 0:
+            carry += data
+            continue
+
+        yield carry + data[:cut]
+        carry = data[cut:]
+
+    if carry:
+        yield carry
+
+def tokenize_codes(chunks, line_number=1):
     """
-    Scans the input stream for lexical tokens and returns them one at a time. 
+    Scans line-aligned chunks of bytes with LEXEME_PATTERN and yields compact
+    tokens for internal consumers: integer categories and raw lexeme bytes.
     If an error is encountered, it skips the rest of the line and moves to the next one.
 
     Inputs:
-    - input_stream: A file-like object representing the input file.
+    - chunks: An iterable of bytes-like objects that end on line boundaries.
+    - line_number: The line number of the first line in the first chunk.
 
     Returns:
-    - A tuple representing a token in the format (line_number, category_name, lexeme).
+    - A generator of tokens in the format (line_number, category, lexeme), where
+      category is one of the category constants and lexeme is bytes: the
+      keyword, the digits of a constant or register, b"\\n" for a newline, and
+      for INVALID the invalid word (b"" for an invalid character). After the
+      input is exhausted it keeps yielding the EOF token.
     """
-    global input_pointer, buffer, line_number
+    lookup = fixed_lexemes.get
+    newline = b"\\n"
 
-    # Initially fill the buffer if it is empty
-    if not buffer:
-        fill_buffer(input_stream)
+    for chunk in chunks:
+        skipping = False
 
-    lexeme = ""
-
-    while True:
-        char = next_char(input_stream)
-
-        # Handle EOF
-        if char is None:
-            error_token = (line_number, category_names[EOF], "")
-            return error_token
-
-        # Handle new lines
-        if char == '\n':
-            token = (line_number, category_names[EOL], "\\n")
-            line_number += 1
-            lexeme = ""
-            return token
-
-        # Handle whitespace (other than newlines)
-        if char.isspace():
-            continue
+        for lexeme in LEXEME_PATTERN.findall(chunk):
+            fixed = lookup(lexeme)
+            if fixed is not None:
+                category = fixed[0]
+            else:
+                category = byte_class[lexeme[0]]
+                # "r" without digits is a word, "/" alone is not a comment
+                if category == REGISTER and not lexeme[1:2].isdigit():
+                    category = INVALID
+                elif category == EOL and lexeme[1:2] != b"/":
+                    category = INVALID
 
-        # Handle comma
-        if char == ',':
-            return (line_number, category_names[COMMA], ',')
+            # After an error, drop everything up to the end of the line
+            if skipping:
+                if category != EOL:
+                    continue
+                skipping = False
 
-        # Check for "=>"
-        if char == '=':
-            next_c = next_char(input_stream)
-            if next_c == '>':
-                token = (line_number, category_names[INTO], "=>")
-                return token
-            else:
-                rollback()
-                error_token = ("ERROR", line_number, lexeme)
-                return error_token
-            
-        # Check for keywords first (e.g., rshift, load, etc.)
-        if char.isalpha():
-            lexeme = char
-            while True:
-                next_c = next_char(input_stream)
-                if next_c is None or not next_c.isalpha():
-                    rollback()
-                    break
-                lexeme += next_c
-            if lexeme in patterns:
-                token = (line_number, category_names[patterns[lexeme]], lexeme)
-                return token
-
-            # If not a keyword, we handle it further down for potential register
-            if lexeme == 'r':
-                next_c = next_char(input_stream)
-                if next_c is not None and next_c.isdigit():
-                    lexeme += next_c
-                    while True:
-                        next_c = next_char(input_stream)
-                        if next_c is None or not next_c.isdigit():
-                            rollback()
-                            break
-                        lexeme += next_c
-                    token = (line_number, category_names[REGISTER], lexeme[1:])
-                    return token
-                else:
-                    rollback() 
-                    return ("ERROR", line_number, lexeme) 
-
-            
-        # Handle constants
-        if char.isdigit():
-            lexeme = char
-            while True:
-                next_c = next_char(input_stream)
-                if next_c is None or not next_c.isdigit():
-                    rollback()
-                    break
-                lexeme += next_c
-            return (line_number, category_names[CONSTANT], lexeme)
-
-        # Handle comments (//)
-        if char == '/':
-            next_c = next_char(input_stream)
-            if next_c == '/':
-                # Skip the rest of the line
-                while char != '\n' and char is not None:
-                    char = next_char(input_stream)
-                token = (line_number, category_names[EOL], "\\n")
+            if category == EOL:
+                yield (line_number, EOL, newline)
                 line_number += 1
-                return token
+            elif fixed is not None or category == CONSTANT:
+                yield (line_number, category, lexeme)
+            elif category == REGISTER:
+                yield (line_number, REGISTER, lexeme[1:])
+            elif lexeme[0] in ALPHA_BYTES:
+                yield (line_number, INVALID, lexeme)
+                # A lone 'r' is reported without discarding the line
+                skipping = lexeme != b"r"
             else:
-                while char != '\n' and char is not None:
-                    char = next_char(input_pointer)
-                rollback()
-                error_token = ("ERROR", line_number, lexeme)
-                return error_token
-
-        # Handle invalid characters
-        error_token = ("ERROR", line_number, lexeme)
-        while char != '\n' and char is not None:
-            char = next_char(input_pointer)
-        rollback()
-        return error_token
+                yield (line_number, INVALID, b"")
+                # A lone '=' is reported without discarding the line
+                skipping = lexeme != b"="
+
+    while True:
+        yield (line_number, EOF, b"")
+
+def token_from_code(token):
+    """
+    Converts a token from tokenize_codes to the (line_number, category_name, lexeme)
+    format, or ("ERROR", line_number, lexeme) for invalid words.
+    """
+    line_number, category, lexeme = token
+    if category == INVALID:
+        return ("ERROR", line_number, lexeme.decode())
+    return (line_number, category_names[category], lexeme.decode())
+
+def dump_tokens(input_stream, output, batch_size=DUMP_BATCH):
+    """
+    Writes every token of the input, up to and including ENDFILE, in the
+    format of the -s flag. Lines are rendered as bytes and written in
+    batches, so the output is not flushed once per token.
+
+    Inputs:
+    - input_stream: A file-like object or mmap representing the input to scan.
+    - output: A binary file-like object to write to.
+    - batch_size: The number of tokens per write.
+    """
+    templates = [b'%d: < ' + name.encode() + b', "%s" >\n' for name in category_names]
+    templates[REGISTER] = b'%d: < REG, "r%s" >\n'
+    templates[INVALID] = b'ERROR: < %d, "%s" >\n'
+
+    batch = []
+    for line_number, category, lexeme in tokenize_codes(read_chunks(input_stream)):
+        batch.append(templates[category] % (line_number, lexeme))
+        if category == EOF:
+            break
+        if len(batch) >= batch_size:
+            output.write(b"".join(batch))
+            batch.clear()
+    output.write(b"".join(batch))
+
+class Scanner:
+    """
+    Scans a single input for lexical tokens. All scanning state lives in the
+    instance, so any number of inputs can be scanned at the same time.
+
+    Attributes:
+    - input_stream: The input being scanned (file-like object or mmap).
+    - codes: The generator producing this input's tokens (see tokenize_codes).
+    """
+    def __init__(self, input_stream, line_number=1):
+        """
+        Inputs:
+        - input_stream: A file-like object or mmap representing the input to scan.
+        - line_number: The line number of the first line in the input.
+        """
+        self.input_stream = input_stream
+        self.codes = tokenize_codes(read_chunks(input_stream), line_number)
+
+    def scan_code(self):
+        """
+        Returns the next token in the format (line_number, category, lexeme bytes).
+        """
+        return next(self.codes)
+
+    def scan(self):
+        """
+        Returns the next token in the format (line_number, category_name, lexeme).
+        """
+        return token_from_code(next(self.codes))
+
+def scan(input_stream):
+    """
+    Scans the input stream for lexical tokens and returns them one at a time. 
+    If an error is encountered, it skips the rest of the line and moves to the next one.
+    Compatibility wrapper around a module-level Scanner.
+
+    Inputs:
+    - input_stream: A file-like object representing the input file.
+
+    Returns:
+    - A tuple representing a token in the format (line_number, category_name, lexeme).
+    """
+    global default_scanner
+
+    # Start a new scanner whenever a different input is scanned
+    if default_scanner is None or input_stream is not default_scanner.input_stream:
+        default_scanner = Scanner(input_stream)
 
+    return default_scanner.scan()
@@ -1,21 +1,102 @@
+import heapq
+from array import array
+from dependence_graph import EDGE_SERIAL, SERIAL_DELAY
+from opcodes import LATENCY, UNIT, UNIT_ANY, UNIT_MEMORY, UNIT_MULT
+
+# Slots in the calendar of operations waiting to become ready: an
+# operation is released at most max(LATENCY) cycles after its last
+# dependence issues, so a slot never holds two different cycles
+CALENDAR_SIZE = max(max(LATENCY), SERIAL_DELAY) + 1
+
+# The schedule entry of a cycle in which nothing issues
+NOP_CYCLE = ["nop", "nop"]
+
+class ReadyQueue:
+    """
+    The operations ready to issue, in one heap per functional-unit class
+    (opcodes.UNIT). Entries are (key, node id) with smaller keys first.
+    Operations held back by a unit that is already used this cycle stay in
+    their heap, so nothing is re-sorted; pushing and selecting cost
+    O(log n).
+    """
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.heaps = {UNIT_ANY: [], UNIT_MEMORY: [], UNIT_MULT: []}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, node, key):
+        heapq.heappush(self.heaps[UNIT[node.instruction.opcode]], (key, node.index))
+        self.size += 1
+
+    def select(self):
+        """
+        Removes and returns up to two operations for one cycle: the one
+        with the smallest key, then the smallest-keyed operation whose unit
+        is still free (at most one MEMORY and one MULT operation).
+        """
+        heaps = self.heaps
+        any_heap = heaps[UNIT_ANY]
+        # The only entries that can be chosen: two unconstrained ones and
+        # the first of each constrained unit
+        candidates = []
+        if any_heap:
+            candidates.append((any_heap[0], UNIT_ANY))
+            # The second smallest entry of a heap is a child of the root
+            if len(any_heap) > 1:
+                candidates.append((min(any_heap[1:3]), UNIT_ANY))
+        for unit in (UNIT_MEMORY, UNIT_MULT):
+            if heaps[unit]:
+                candidates.append((heaps[unit][0], unit))
+        candidates.sort()
+
+        selected = []
+        for (key, index), unit in candidates[:2]:
+            heapq.heappop(heaps[unit])
+            selected.append(self.nodes[index])
+        self.size -= len(selected)
+        return selected
+
 class Scheduler:
-    def __init__(self, dependence_graph, rev_graph):
+    def __init__(self, dependence_graph, liveness=None):
         self.graph = dependence_graph
-        self.rev_graph = rev_graph
+        # Optional liveness.Liveness of the block, used to break priority ties
+        self.liveness = liveness
         # Current cycle
         self.cycle = 1  
+        # Number of each operation's dependences that have not issued yet
+        offsets = self.graph.succ_offsets
+        self.waiting = array('i', [end - start for start, end in zip(offsets, offsets[1:])])
+        # Earliest cycle each operation may issue, given the dependences issued so far
+        self.earliest = array('i', bytes(4 * len(self.graph.nodes)))
         # Operations ready to execute
-        self.ready = set(self.graph.leaf_nodes())  
-        # Operations currently executing (node, retire cycle)
-        self.active = set() 
+        self.ready = ReadyQueue(self.graph.nodes)
+        for node in self.graph.leaf_nodes():
+            self.ready.push(node, self.key(node))
+        # Operations whose dependences have all issued, bucketed by their
+        # earliest cycle modulo CALENDAR_SIZE
+        self.calendar = [[] for _ in range(CALENDAR_SIZE)]
+        self.pending = 0
         # Final schedule 
         self.schedule = []  
 
     def schedule_operations(self):
         """
         Schedules operations based on the dependence graph, allowing up to two instructions per cycle.
+        An operation may issue once every dependence has issued and its
+        edge delay (edge_delay) has passed.
         """
-        while self.ready or self.active:
+        while self.ready or self.pending:
+            if not self.ready:
+                # Nothing can issue until the next operation is released
+                next_cycle = self.next_release_cycle()
+                self.schedule.extend((cycle, NOP_CYCLE) for cycle in range(self.cycle, next_cycle))
+                self.cycle = next_cycle
+                self.update_ready()
+                continue
+
             instructions_this_cycle = []
 
             # Select operations for this cycle
@@ -23,21 +104,17 @@ class Scheduler:
             selected_ops = [op for op in (op1, op2) if op is not None]
 
             for op in selected_ops:
-                retire_cycle = self.cycle + self.get_latency(op)
-                self.active.add((op, retire_cycle))
                 instructions_this_cycle.append(op.instruction)
                 # Mark as active
                 op.status = 3  
+                self.release_dependents(op)
 
-            # Record the scheduled instructions or add NOP if no instructions were scheduled
-            if instructions_this_cycle:
-                self.schedule.append((self.cycle, instructions_this_cycle))
-            else:
-                self.schedule.append((self.cycle, ["nop", "nop"]))
+            # Record the scheduled instructions
+            self.schedule.append((self.cycle, instructions_this_cycle))
 
             # Increment cycle and update sets
             self.cycle += 1
-            self.update_active()
+            self.update_ready()
 
         return self.schedule
     
@@ -48,74 +125,87 @@ class Scheduler:
         - No two stores in one cycle
         - No two mults in one cycle
         - No load and store in the same cycle
+        Each opcode's functional-unit class (opcodes.UNIT) says which of
+        these limits applies. Operations are taken in order of key().
         """
-        load_selected = False
-        store_selected = False
-        mult_selected = False
-
-        selected_ops = []
-
-        for node in sorted(self.ready, key=lambda n: n.priority, reverse=True):
-            opcode = node.instruction.opcode
-
-            if opcode == 'load':
-                if load_selected or store_selected:  
-                    continue
-                load_selected = True
-            elif opcode == 'store':
-                if store_selected or load_selected: 
-                    continue
-                store_selected = True
-            elif opcode == 'mult':
-                if mult_selected: 
-                    continue
-                mult_selected = True
-            else:
-                pass
-
-            selected_ops.append(node)
-   
-            if len(selected_ops) == 2:
-                break
-
-        for node in selected_ops:
-            self.ready.remove(node)
+        selected_ops = self.ready.select()
 
         while len(selected_ops) < 2:
             selected_ops.append(None)
 
         return tuple(selected_ops)
 
-    def update_active(self):
+    def key(self, node):
         """
-        Removes completed operations from the Active set and adds successors to the Ready set.
+        Returns the ready-queue key of an operation, smallest first: highest
+        priority, then (with liveness) the operation that lowers register
+        pressure the most, then program order.
         """
-        completed = [
-            (node, retire_cycle) for node, retire_cycle in self.active
-            if self.cycle >= retire_cycle
-        ]
+        if self.liveness is not None:
+            # Among equal priorities, prefer operations that end live ranges
+            return (-node.priority, self.liveness.change(node.instruction.line_number), node.index)
+        return (-node.priority, 0, node.index)
 
-        for node, retire_cycle in completed:
-            
-            self.active.remove((node, retire_cycle))
-            # Mark as retired once removed from Active
-            node.status = 4  
+    def release_dependents(self, node):
+        """
+        Counts down the operations that depend on an operation issued this
+        cycle, moving each one whose dependences have now all issued into
+        the calendar slot of the earliest cycle it may issue.
+        """
+        nodes = self.graph.nodes
+        offsets = self.graph.pred_offsets
+        targets = self.graph.pred_targets
+        kinds = self.graph.pred_kinds
+        waiting = self.waiting
+        earliest = self.earliest
+        for edge in range(offsets[node.index], offsets[node.index + 1]):
+            parent_index = targets[edge]
+            release = self.cycle + self.edge_delay(node, kinds[edge])
+            if release > earliest[parent_index]:
+                earliest[parent_index] = release
+            waiting[parent_index] -= 1
+            if waiting[parent_index] == 0:
+                self.calendar[earliest[parent_index] % CALENDAR_SIZE].append(nodes[parent_index])
+                self.pending += 1
+
+    def update_ready(self):
+        """
+        Adds the operations released for the current cycle to the Ready set.
+        """
+        released = self.calendar[self.cycle % CALENDAR_SIZE]
+        self.pending -= len(released)
+        for node in released:
+            # Mark as ready
+            node.status = 2  
+            self.ready.push(node, self.key(node))
+        released.clear()
+
+    def next_release_cycle(self):
+        """
+        Returns the first cycle after the current one in which an operation
+        is released.
+        """
+        for cycle in range(self.cycle + 1, self.cycle + CALENDAR_SIZE):
+            if self.calendar[cycle % CALENDAR_SIZE]:
+                return cycle
+        raise RuntimeError("no operation is waiting")
 
-            # Check successors in the reverse graph
-            for parent, _ in self.rev_graph.edges[node]:
-                if parent.status == 1:
-                    # Check if all parents of the successor are retired
-                    if all(dep.status == 4 for dep, _ in self.graph.edges[parent]):
-                        # Mark as ready
-                        parent.status = 2  
-                        self.ready.add(parent)
+    def edge_delay(self, node, kind):
+        """
+        Returns how many cycles after node issues an operation that depends
+        on it through an edge of the given kind may issue: the full latency
+        for data and conflict edges, SERIAL_DELAY for serial edges, which
+        only keep memory operations in order.
+        """
+        if kind == EDGE_SERIAL:
+            return SERIAL_DELAY
+        return self.get_latency(node)
 
     def get_latency(self, node):
         """
         Returns the latency for a given operation based on its opcode.
         """
-        latencies = {'load': 6, 'store': 6, 'mult': 3, 'add': 1, 'loadI': 1, 'output': 1}
-        return latencies.get(node.instruction.opcode, 1)
+        return LATENCY[node.instruction.opcode]
 
     def format_schedule(self):
         """
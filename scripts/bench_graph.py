@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+
+# COMP 412 Lab 3 Dependence Graph Benchmark
+#
+# Generates blocks dense in stores and outputs (a few loadI's, then a
+# repeating mix of store, load, output and add) at increasing sizes and
+# reports the edge count and build time of DependenceGraph.build_graph
+# next to the original construction (reproduced below as the baseline),
+# which scans every earlier memory operation for each load, store and
+# output. The baseline is quadratic, so it is only run up to --baseline-max
+# operations (default 8192).
+#
+# Usage: scripts/bench_graph.py [--baseline-max N] [size ...]
+#
+
+import io, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parser_1 import Parser
+from dependence_graph import DependenceGraph, Node
+from opcodes import OP_OUTPUT, READS_MEMORY, WRITES_MEMORY
+
+SIZES = [1000, 2000, 4000, 8000, 16000, 32000, 64000]
+
+## Baseline: the original build_graph, with every memory op in one list
+## and a dict of (node, label) lists as the edge store
+def build_baseline(graph):
+    last_def = {}
+    last_memory_ops = []
+    nodes = []
+    edges = {}
+
+    def add_edge(from_node, to_node, dep_type, vr):
+        label = f"{dep_type}, vr{vr}" if vr is not None else dep_type
+        edges[from_node].append((to_node, label))
+
+    current_instruction = graph.ir.head
+    while current_instruction:
+        node = Node(current_instruction, len(nodes))
+        nodes.append(node)
+        edges[node] = []
+
+        defs = graph.get_defs(current_instruction)
+        uses = graph.get_uses(current_instruction)
+        opcode = current_instruction.opcode
+        if len(defs) > 0:
+            last_def[defs[0]] = node
+        for vr in uses:
+            if vr in last_def:
+                add_edge(node, last_def[vr], "data", vr)
+
+        if READS_MEMORY[opcode]:
+            for mem_node in last_memory_ops:
+                if WRITES_MEMORY[mem_node.instruction.opcode]:
+                    add_edge(node, mem_node, "conflict", None)
+        if WRITES_MEMORY[opcode]:
+            for mem_node in last_memory_ops:
+                add_edge(node, mem_node, "serial", None)
+        elif opcode == OP_OUTPUT:
+            for mem_node in last_memory_ops:
+                if mem_node.instruction.opcode == OP_OUTPUT:
+                    add_edge(node, mem_node, "serial", None)
+
+        if READS_MEMORY[opcode] or WRITES_MEMORY[opcode]:
+            last_memory_ops.append(node)
+        current_instruction = current_instruction.next
+    return sum(len(deps) for deps in edges.values())
+
+def build_linear(graph):
+    graph.build_graph()
+    return graph.edge_count()
+
+def memory_block(operations):
+    """
+    Returns an ILOC block of about the given number of operations in which
+    half the operations are stores or outputs.
+    """
+    lines = ["loadI 1024 => r0", "loadI 1028 => r1", "loadI 4 => r2"]
+    while len(lines) < operations:
+        lines += ["store r2 => r0", "load r1 => r3", "output 1024",
+                  "add r3, r2 => r2", "store r3 => r1", "output 1028"]
+    return ("\n".join(lines) + "\n").encode()
+
+def build(data, builder):
+    ir, count = Parser().parse(io.BytesIO(data))
+    ir.rename_registers()
+    graph = DependenceGraph(ir)
+    start = time.perf_counter()
+    edges = builder(graph)
+    elapsed = time.perf_counter() - start
+    return count, edges, elapsed
+
+def main():
+    args = sys.argv[1:]
+    baseline_max = 8192
+    if len(args) >= 2 and args[0] == '--baseline-max':
+        baseline_max = int(args[1])
+        args = args[2:]
+    sizes = [int(size) for size in args] or SIZES
+
+    print(f"{'ops':>8} {'edges':>9} {'ms':>8} {'base edges':>11} {'base ms':>9}")
+    for size in sizes:
+        data = memory_block(size)
+        count, edges, elapsed = build(data, build_linear)
+        row = f"{count:>8} {edges:>9} {elapsed * 1000:>8.1f}"
+        if count <= baseline_max:
+            _, base_edges, base_elapsed = build(data, build_baseline)
+            row += f" {base_edges:>11} {base_elapsed * 1000:>9.1f}"
+        print(row)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+
+# COMP 412 Lab 3 Memory Benchmark
+#
+# Reports the memory held per ILOC operation after parsing and renaming each
+# timing block, for the linked-list IR and the columnar IR, and for the
+# dependence graph built on top of the linked-list IR. Sizes are measured
+# with tracemalloc, so they count Python allocations only.
+#
+# With --limit N the script exits with status 1 if any linked-list IR
+# needs more than N bytes per operation, so it can guard against regressions.
+#
+# Usage: scripts/bench_memory.py [--limit N] [block ...]
+#
+
+import os, sys, tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parser_1 import Parser
+from columnar_ir import ColumnarIR
+from dependence_graph import DependenceGraph
+
+TIMING_BLOCKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'grading', 'auto_time', 'timing_blocks')
+
+def build_ir(path, ir=None):
+    with open(path, 'rb') as f:
+        ir, count = Parser(ir).parse(f)
+    ir.rename_registers()
+    return ir, count
+
+def bytes_held(build):
+    """
+    Returns the bytes still allocated by the objects build() returns, and its result.
+    """
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+def build_graph(path):
+    ir, count = build_ir(path)
+    graph = DependenceGraph(ir)
+    graph.build_graph()
+    return graph, count
+
+def main():
+    args = sys.argv[1:]
+    limit = None
+    if len(args) >= 2 and args[0] == '--limit':
+        limit = float(args[1])
+        args = args[2:]
+    names = args or sorted(os.listdir(TIMING_BLOCKS))
+
+    failed = False
+    print(f"{'block':<10} {'ops':>8} {'linked B/op':>12} {'columnar B/op':>14} {'graph B/op':>11}")
+    for name in names:
+        path = name if os.path.exists(name) else os.path.join(TIMING_BLOCKS, name)
+
+        linked, (_, count) = bytes_held(lambda: build_ir(path))
+        columnar, _ = bytes_held(lambda: build_ir(path, ColumnarIR()))
+        graph, _ = bytes_held(lambda: build_graph(path))
+
+        print(f"{os.path.basename(path):<10} {count:>8} {linked / count:>12.1f} "
+              f"{columnar / count:>14.1f} {graph / count:>11.1f}")
+        if limit is not None and linked / count > limit:
+            failed = True
+
+    if failed:
+        print(f"\nLinked-list IR exceeds {limit:g} bytes per operation")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+
+# COMP 412 Lab 3 Parallel Parsing Benchmark
+#
+# Builds a synthetic block of about a million operations by repeating a
+# timing block, then reports the time to parse it in-process and with
+# Parser.parse_parallel on 1, 2, 4 and 8 worker processes. Both IRs are
+# measured; stitching worker results onto the linked list costs one node
+# per operation in the parent, the columnar IR only extends its arrays.
+#
+# Speedups are bounded by the number of CPUs (os.cpu_count()).
+#
+# Usage: scripts/bench_parallel.py [--ops N] [block]
+#
+
+import io, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parser_1 import Parser
+from columnar_ir import ColumnarIR
+
+TIMING_BLOCKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'grading', 'auto_time', 'timing_blocks')
+WORKERS = [1, 2, 4, 8]
+
+def synthetic_block(path, operations):
+    with open(path, 'rb') as f:
+        data = f.read()
+    lines = data.count(b"\n") or 1
+    return data * max(1, operations // lines)
+
+def measure(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = fn()
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+def main():
+    args = sys.argv[1:]
+    operations = 1000000
+    if len(args) >= 2 and args[0] == '--ops':
+        operations = int(args[1])
+        args = args[2:]
+    name = args[0] if args else 'T128k.i'
+    path = name if os.path.exists(name) else os.path.join(TIMING_BLOCKS, name)
+    data = synthetic_block(path, operations)
+
+    print(f"{len(data) / 1e6:.1f} MB from {os.path.basename(path)}, {os.cpu_count()} CPUs")
+    print(f"{'IR':<9} {'workers':>8} {'ops':>9} {'seconds':>8} {'speedup':>8}")
+    for label, make_ir in (('linked', lambda: None), ('columnar', ColumnarIR)):
+        count, serial = measure(lambda: Parser(make_ir()).parse(io.BytesIO(data))[1])
+        print(f"{label:<9} {'serial':>8} {count:>9} {serial:>8.2f} {1.0:>7.2f}x")
+        for workers in WORKERS:
+            count, elapsed = measure(lambda: Parser(make_ir()).parse_parallel(io.BytesIO(data), workers, threshold=0)[1])
+            print(f"{label:<9} {workers:>8} {count:>9} {elapsed:>8.2f} {serial / elapsed:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+
+# COMP 412 Lab 3 Parser Benchmark
+#
+# Measures parse time per operation on the timing blocks, comparing the
+# line-oriented fast path (Parser.parse) against the token-at-a-time
+# recursive-descent parser (Parser.parse_tokens).
+#
+# Usage: scripts/bench_parser.py [block ...]
+#
+
+import io, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parser_1 import Parser
+
+TIMING_BLOCKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'grading', 'auto_time', 'timing_blocks')
+
+def run_fast_path(data):
+    _, count = Parser().parse(io.BytesIO(data))
+    return count
+
+def run_recursive_descent(data):
+    return Parser().parse_tokens(io.BytesIO(data))
+
+def measure(fn, data, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = fn(data)
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+def main():
+    names = sys.argv[1:] or sorted(os.listdir(TIMING_BLOCKS))
+
+    print(f"{'block':<10} {'ops':>8} {'descent us/op':>14} {'fast us/op':>11} {'speedup':>8}")
+    for name in names:
+        path = name if os.path.exists(name) else os.path.join(TIMING_BLOCKS, name)
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        slow_count, slow_time = measure(run_recursive_descent, data)
+        fast_count, fast_time = measure(run_fast_path, data)
+        if slow_count != fast_count:
+            print(f"{name}: operation counts differ ({slow_count} vs {fast_count})")
+
+        print(f"{os.path.basename(path):<10} {fast_count:>8} {slow_time / slow_count * 1e6:>14.2f} "
+              f"{fast_time / fast_count * 1e6:>11.2f} {slow_time / fast_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+
+# COMP 412 Lab 3 Priority Benchmark
+#
+# Times DependenceGraph.calculate_priorities alone (parsing, renaming and
+# graph construction are not timed) on the timing blocks and reports the
+# cost per node and per edge, which should stay flat as blocks grow. The
+# original recursive computation, which scans every edge to find each
+# node's dependents, is reproduced below as the baseline and run on blocks
+# of up to --baseline-max operations (default 4096), with the recursion
+# limit raised so that it can finish.
+#
+# Usage: scripts/bench_priorities.py [--baseline-max N] [block ...]
+#
+
+import os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parser_1 import Parser
+from dependence_graph import DependenceGraph, EDGE_SERIAL
+from opcodes import LATENCY
+
+TIMING_BLOCKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'grading', 'auto_time', 'timing_blocks')
+
+## Baseline: the original memoized recursion over an O(n*e) dependent scan
+def priorities_baseline(graph):
+    nodes = graph.nodes
+    def max_latency_path(node):
+        if node.max_latency is not None:
+            return node.max_latency
+        latency = LATENCY[node.instruction.opcode]
+        max_path = latency
+        for from_node in [n for n in nodes for dep in graph.successors(n.index) if dep == node.index]:
+            max_path = max(max_path, max_latency_path(from_node) + latency)
+        node.max_latency = max_path
+        return max_path
+
+    for node in graph.nodes:
+        max_latency_path(node)
+    for node in graph.nodes:
+        node.priority = node.max_latency
+
+def build(path):
+    with open(path, 'rb') as f:
+        ir, count = Parser().parse(f)
+    ir.rename_registers()
+    graph = DependenceGraph(ir)
+    graph.build_graph()
+    return graph, count
+
+def measure(path, calculate):
+    graph, count = build(path)
+    start = time.perf_counter()
+    calculate(graph)
+    return graph, count, time.perf_counter() - start
+
+def main():
+    args = sys.argv[1:]
+    baseline_max = 4096
+    if len(args) >= 2 and args[0] == '--baseline-max':
+        baseline_max = int(args[1])
+        args = args[2:]
+    names = args or sorted(os.listdir(TIMING_BLOCKS))
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * baseline_max + 1000))
+
+    print(f"{'block':<10} {'ops':>7} {'edges':>8} {'ms':>8} {'ns/node':>8} {'ns/edge':>8} {'base ms':>9}")
+    for name in names:
+        path = name if os.path.exists(name) else os.path.join(TIMING_BLOCKS, name)
+        graph, count, elapsed = measure(path, DependenceGraph.calculate_priorities)
+        edges = graph.edge_count()
+        nodes = len(graph.nodes)
+        row = (f"{os.path.basename(path):<10} {count:>7} {edges:>8} {elapsed * 1000:>8.1f} "
+               f"{elapsed * 1e9 / max(nodes, 1):>8.0f} {elapsed * 1e9 / max(edges, 1):>8.0f}")
+        if count <= baseline_max:
+            base, _, base_elapsed = measure(path, priorities_baseline)
+            # The baseline charges serial edges full latency
+            if EDGE_SERIAL not in graph.succ_kinds and [node.priority for node in base.nodes] != [node.priority for node in graph.nodes]:
+                sys.exit(f"{name}: priorities differ from the baseline")
+            row += f" {base_elapsed * 1000:>9.1f}"
+        print(row)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/python3
+
+# COMP 412 Lab 3 Renaming Benchmark
+#
+# Measures register renaming alone (parsing is not timed) on the timing
+# blocks, comparing the single backward pass in ILOCLinkedList and
+# ColumnarIR against the original renaming pass (reproduced below as the
+# baseline), which pre-scans the list for max_sr and copies it into a
+# Python list before its backward pass. When NumPy is installed the
+# vectorized ColumnarIR.rename_registers_numpy is timed as well.
+#
+# With --ops N each block is repeated to about N operations.
+#
+# Usage: scripts/bench_rename.py [--ops N] [block ...]
+#
+
+import io, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parser_1 import Parser
+from columnar_ir import ColumnarIR, numpy
+from opcodes import OP_STORE, OP_LOADI, OP_OUTPUT
+
+TIMING_BLOCKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'grading', 'auto_time', 'timing_blocks')
+
+## Baseline: the original max_sr pre-scan and two-pass renaming
+def max_sr(ir):
+    node = ir.head
+    max_sr = 0
+    while node:
+        max_sr = max(max_sr, node.max_sr())
+        node = node.next
+    return max_sr
+
+def rename_baseline(ir):
+    # Tracks MAXLIVE value
+    MAXLIVE = 0
+    # Assume 2x source registers for safety
+    max_reg = max_sr(ir) * 2
+
+    # Initializations
+    max_vr = -1
+    sr_to_vr = [None] * (max_reg + 1)
+    lu = [float('inf')] * (max_reg + 1)
+
+    # Track live registers
+    live = 0
+
+    # Step 1: Traverse the linked list to collect instructions
+    instructions = []
+    curr_node = ir.head
+
+    idx = 0
+    while curr_node:
+        instructions.append(curr_node)
+        curr_node.line_number = idx
+        idx += 1
+        curr_node = curr_node.next
+
+    idx = len(instructions) - 1
+
+    # Step 2: Process each instruction from last to first
+    while idx >= 0:
+        curr_instr = instructions[idx]
+
+        # Extract source registers
+        sr1 = curr_instr.arg1.sr
+        sr2 = curr_instr.arg2.sr
+        sr3 = curr_instr.arg3.sr
+
+        # Definition cases
+        if sr3 != None and curr_instr.opcode != OP_STORE:
+            if sr_to_vr[sr3] == None:
+                max_vr += 1
+                sr_to_vr[sr3] = max_vr
+                live += 1
+
+            live -= 1
+            curr_instr.arg3.vr = sr_to_vr[sr3]
+            curr_instr.arg3.nu = lu[sr3]
+            sr_to_vr[sr3] = None
+            lu[sr3] = float('inf')
+
+        # Use cases
+        if sr1 != None and curr_instr.opcode != OP_LOADI and curr_instr.opcode != OP_OUTPUT:
+            live += 1
+            if sr_to_vr[sr1] == None:
+                max_vr += 1
+                sr_to_vr[sr1] = max_vr
+            curr_instr.arg1.vr = sr_to_vr[sr1]
+            curr_instr.arg1.nu = lu[sr1]
+
+        if sr2 != None:
+            live += 1
+            if sr_to_vr[sr2] == None:
+                max_vr += 1
+                sr_to_vr[sr2] = max_vr
+                live += 1
+
+            curr_instr.arg2.vr = sr_to_vr[sr2]
+            curr_instr.arg2.nu = lu[sr2]
+
+        # Operand 3 for store is always a use case
+        if sr3 != None and curr_instr.opcode == OP_STORE:
+            live += 1
+            if sr_to_vr[sr3] == None:
+                max_vr += 1
+                sr_to_vr[sr3] = max_vr
+            curr_instr.arg3.vr = sr_to_vr[sr3]
+            curr_instr.arg3.nu = lu[sr3]
+
+        if sr1 != None and curr_instr.opcode != OP_LOADI:
+            lu[sr1] = idx
+
+        if sr2 != None:
+            lu[sr2] = idx
+
+        if sr3 != None:
+            if curr_instr.opcode == OP_STORE:
+                lu[sr3] = idx
+
+        if live > MAXLIVE:
+            MAXLIVE = live
+
+        idx -= 1
+
+    return max_vr, live
+
+def parse(data, ir=None):
+    return Parser(ir).parse(io.BytesIO(data))[0]
+
+def measure(fn, ir, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(ir)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    args = sys.argv[1:]
+    operations = None
+    if len(args) >= 2 and args[0] == '--ops':
+        operations = int(args[1])
+        args = args[2:]
+    names = args or ['T128k.i']
+
+    print(f"{'block':<10} {'ops':>8} {'baseline ms':>12} {'linked ms':>10} {'columnar ms':>12} "
+          f"{'numpy ms':>9} {'speedup':>8} {'numpy vs columnar':>18}")
+    for name in names:
+        path = name if os.path.exists(name) else os.path.join(TIMING_BLOCKS, name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if operations:
+            # Synthetic block: the timing block repeated up to about N operations
+            data *= max(1, operations // max(1, data.count(b"\n")))
+
+        linked = parse(data)
+        columnar = parse(data, ColumnarIR())
+
+        baseline_time = measure(rename_baseline, linked)
+        linked_time = measure(lambda ir: ir.rename_registers(), linked)
+        columnar_time = measure(lambda ir: ir.rename_registers_sequential(), columnar)
+
+        if numpy is not None:
+            numpy_time = measure(lambda ir: ir.rename_registers_numpy(), columnar)
+            numpy_columns = f"{numpy_time * 1e3:>9.1f}"
+            vectorized = f"{columnar_time / numpy_time:>17.1f}x"
+        else:
+            numpy_columns = f"{'-':>9}"
+            vectorized = f"{'(no numpy)':>18}"
+
+        print(f"{os.path.basename(path):<10} {linked.count:>8} {baseline_time * 1e3:>12.1f} "
+              f"{linked_time * 1e3:>10.1f} {columnar_time * 1e3:>12.1f} {numpy_columns} "
+              f"{baseline_time / linked_time:>7.1f}x {vectorized}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+
+# COMP 412 Lab 3 Scanner Benchmark
+#
+# Measures scanner throughput in MB/s on the timing blocks, comparing the
+# table-driven byte scanner in scanner.py against the original
+# character-at-a-time scanner (reproduced below as the baseline).
+#
+# Usage: scripts/bench_scanner.py [block ...]
+#
+
+import io, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import scanner
+from scanner import category_names, patterns, EOF, EOL, COMMA, INTO, REGISTER, CONSTANT
+
+TIMING_BLOCKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'grading', 'auto_time', 'timing_blocks')
+
+## Baseline: the original next_char/rollback scanner
+BUFFER_SIZE = 4096
+buffer = []
+input_pointer = 0
+line_number = 1
+
+def fill_buffer(input_stream):
+    global buffer
+    buffer = list(input_stream.read(BUFFER_SIZE))
+    return len(buffer) > 0
+
+def next_char(input_stream):
+    global input_pointer
+    if input_pointer >= len(buffer):
+        if not fill_buffer(input_stream):
+            return None
+        input_pointer = 0
+    char = buffer[input_pointer]
+    input_pointer += 1
+    return char
+
+def rollback():
+    global input_pointer
+    if input_pointer > 0:
+        input_pointer -= 1
+
+def scan_chars(input_stream):
+    global line_number
+    lexeme = ""
+    while True:
+        char = next_char(input_stream)
+        if char is None:
+            return (line_number, category_names[EOF], "")
+        if char == '\n':
+            token = (line_number, category_names[EOL], "\\n")
+            line_number += 1
+            return token
+        if char.isspace():
+            continue
+        if char == ',':
+            return (line_number, category_names[COMMA], ',')
+        if char == '=':
+            if next_char(input_stream) == '>':
+                return (line_number, category_names[INTO], "=>")
+            rollback()
+            return ("ERROR", line_number, lexeme)
+        if char.isalpha():
+            lexeme = char
+            while True:
+                next_c = next_char(input_stream)
+                if next_c is None or not next_c.isalpha():
+                    rollback()
+                    break
+                lexeme += next_c
+            if lexeme in patterns:
+                return (line_number, category_names[patterns[lexeme]], lexeme)
+            if lexeme == 'r':
+                next_c = next_char(input_stream)
+                if next_c is not None and next_c.isdigit():
+                    lexeme += next_c
+                    while True:
+                        next_c = next_char(input_stream)
+                        if next_c is None or not next_c.isdigit():
+                            rollback()
+                            break
+                        lexeme += next_c
+                    return (line_number, category_names[REGISTER], lexeme[1:])
+                rollback()
+                return ("ERROR", line_number, lexeme)
+        if char.isdigit():
+            lexeme = char
+            while True:
+                next_c = next_char(input_stream)
+                if next_c is None or not next_c.isdigit():
+                    rollback()
+                    break
+                lexeme += next_c
+            return (line_number, category_names[CONSTANT], lexeme)
+        if char == '/':
+            if next_char(input_stream) == '/':
+                while char != '\n' and char is not None:
+                    char = next_char(input_stream)
+                token = (line_number, category_names[EOL], "\\n")
+                line_number += 1
+                return token
+        return ("ERROR", line_number, lexeme)
+
+def run_baseline(data):
+    global buffer, input_pointer, line_number
+    buffer, input_pointer, line_number = [], 0, 1
+    stream = io.StringIO(data.decode())
+    count = 0
+    while scan_chars(stream)[1] != category_names[EOF]:
+        count += 1
+    return count
+
+def run_table_driven(data):
+    stream = io.BytesIO(data)
+    count = 0
+    table_scanner = scanner.Scanner(stream)
+    while table_scanner.scan()[1] != category_names[EOF]:
+        count += 1
+    return count
+
+def measure(fn, data, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = fn(data)
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+def main():
+    names = sys.argv[1:] or sorted(os.listdir(TIMING_BLOCKS))
+
+    print(f"{'block':<10} {'size KB':>9} {'tokens':>9} {'baseline MB/s':>14} {'table MB/s':>11} {'speedup':>8}")
+    for name in names:
+        path = name if os.path.exists(name) else os.path.join(TIMING_BLOCKS, name)
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        mb = len(data) / 1e6
+        base_count, base_time = measure(run_baseline, data)
+        new_count, new_time = measure(run_table_driven, data)
+        if base_count != new_count:
+            print(f"{name}: token counts differ ({base_count} vs {new_count})")
+
+        print(f"{os.path.basename(path):<10} {len(data) / 1024:>9.0f} {new_count:>9} "
+              f"{mb / base_time:>14.2f} {mb / new_time:>11.2f} {base_time / new_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+
+# COMP 412 Lab 3 Scheduler Benchmark
+#
+# Generates wide blocks, in which thousands of operations are ready at
+# once (a run of independent loadI's, then adds, mults and loads that each
+# read two of them), and times Scheduler.schedule_operations alone
+# (parsing, renaming and graph construction are not timed). The original
+# ready set, which sorts every ready operation each cycle, is reproduced
+# below as the baseline and run on blocks of up to --baseline-max
+# operations (default 8192).
+#
+# With --chain the blocks are latency bound instead: one long chain of
+# dependent loads and adds, so most cycles issue nothing. With --fanin
+# they are groups of FANIN loads, each group followed by a store to an
+# address read from memory, which depends on every load in its group.
+#
+# Usage: scripts/bench_scheduler.py [--chain | --fanin] [--baseline-max N] [size ...]
+#
+
+import io, os, random, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parser_1 import Parser
+from dependence_graph import DependenceGraph
+from scheduler import Scheduler
+from liveness import Liveness
+from opcodes import UNIT, UNIT_ANY
+
+SIZES = [1000, 2000, 4000, 8000, 16000, 32000, 64000]
+
+# Loads per store in --fanin blocks
+FANIN = 1024
+
+## Baseline: the original ready set, sorted in full every cycle
+class SortedReadySet:
+    def __init__(self, nodes):
+        self.ready = set()
+        self.keys = {}
+
+    def __len__(self):
+        return len(self.ready)
+
+    def push(self, node, key):
+        self.ready.add(node)
+        self.keys[node] = key
+
+    def select(self):
+        units_selected = set()
+        selected_ops = []
+        for node in sorted(self.ready, key=self.keys.__getitem__):
+            unit = UNIT[node.instruction.opcode]
+            if unit != UNIT_ANY:
+                if unit in units_selected:
+                    continue
+                units_selected.add(unit)
+            selected_ops.append(node)
+            if len(selected_ops) == 2:
+                break
+        for node in selected_ops:
+            self.ready.remove(node)
+        return selected_ops
+
+def wide_block(operations, seed=412):
+    """
+    Returns an ILOC block of about the given number of operations, a
+    quarter of them loadI's that everything else reads.
+    """
+    rng = random.Random(seed)
+    width = max(2, operations // 4)
+    lines = [f"loadI {4 * index} => r{index}" for index in range(width)]
+    ops = ["add", "sub", "mult", "load"]
+    while len(lines) < operations:
+        op = rng.choice(ops)
+        a, b = rng.randrange(width), rng.randrange(width)
+        target = width + len(lines) % width
+        if op == "load":
+            lines.append(f"load r{a} => r{target}")
+        else:
+            lines.append(f"{op} r{a}, r{b} => r{target}")
+    lines.append(f"store r{width} => r0")
+    return ("\n".join(lines) + "\n").encode()
+
+def chain_block(operations):
+    """
+    Returns an ILOC block of about the given number of operations, each
+    depending on the one before it.
+    """
+    lines = ["loadI 0 => r0", "store r0 => r0"]
+    while len(lines) < operations:
+        lines += ["load r0 => r1", "add r1, r0 => r0"]
+    lines.append("output 0")
+    return ("\n".join(lines) + "\n").encode()
+
+def fanin_block(operations):
+    """
+    Returns an ILOC block of about the given number of operations in which
+    every FANIN loads are followed by a store with an unknown address.
+    """
+    lines = ["loadI 0 => r0", "load r0 => r1"]
+    while len(lines) < operations:
+        for index in range(FANIN):
+            lines += [f"loadI {4 * (index + 1)} => r2", "load r2 => r3"]
+        lines.append("store r0 => r1")
+    return ("\n".join(lines) + "\n").encode()
+
+def schedule(data, baseline):
+    ir, count = Parser().parse(io.BytesIO(data))
+    ir.rename_registers()
+    graph = DependenceGraph(ir)
+    graph.build_graph()
+    graph.calculate_priorities()
+    scheduler = Scheduler(graph, Liveness(ir))
+    if baseline:
+        scheduler.ready = SortedReadySet(graph.nodes)
+        for node in graph.leaf_nodes():
+            scheduler.ready.push(node, scheduler.key(node))
+    start = time.perf_counter()
+    cycles = len(scheduler.schedule_operations())
+    return count, cycles, time.perf_counter() - start
+
+def main():
+    args = sys.argv[1:]
+    make_block = wide_block
+    if args and args[0] in ('--chain', '--fanin'):
+        make_block = chain_block if args[0] == '--chain' else fanin_block
+        args = args[1:]
+    baseline_max = 8192
+    if len(args) >= 2 and args[0] == '--baseline-max':
+        baseline_max = int(args[1])
+        args = args[2:]
+    sizes = [int(size) for size in args] or SIZES
+
+    print(f"{'ops':>8} {'cycles':>8} {'ms':>9} {'us/op':>7} {'base cycles':>12} {'base ms':>9}")
+    for size in sizes:
+        data = make_block(size)
+        count, cycles, elapsed = schedule(data, False)
+        row = f"{count:>8} {cycles:>8} {elapsed * 1000:>9.1f} {elapsed * 1e6 / count:>7.1f}"
+        if count <= baseline_max:
+            _, base_cycles, base_elapsed = schedule(data, True)
+            row += f" {base_cycles:>12} {base_elapsed * 1000:>9.1f}"
+        print(row)
+
+if __name__ == "__main__":
+    main()